@@ -9,7 +9,8 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.config.settings import load_environment
-from .routes import leads, tasks
+from .middleware import CompressionMiddleware
+from .routes import leads, tasks, stats
 
 # Load environment variables
 load_environment()
@@ -29,9 +30,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses, e.g. large task results (brotli if installed, else gzip)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(leads.router)
 app.include_router(tasks.router)
+app.include_router(stats.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,106 @@
+"""Response compression: brotli when installed and accepted, gzip otherwise"""
+
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional, see the `compression` extra in pyproject.toml
+    brotli = None
+
+# Content types worth compressing; spreadsheet exports and other binaries are zipped already
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings an Accept-Encoding header allows, i.e. those listed without q=0"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compresses complete responses with brotli, when installed and accepted, or gzip
+
+    Only bodies sent in a single message and of at least `minimum_size` bytes are compressed;
+    streaming responses, responses that already have a Content-Encoding and binary content
+    types pass through unchanged. Levels are moderate because poll responses are compressed
+    on every request: past them, CPU time grows much faster than the size shrinks.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, compresslevel: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, scope: Scope) -> Optional[str]:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, mode=brotli.MODE_TEXT, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.compresslevel, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = self._encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the body shows whether it is worth compressing
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            passthrough = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start["headers"]))
+            headers.add_vary_header("Accept-Encoding")
+            if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                body = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                message = dict(message, body=body)
+            await send(dict(start, headers=headers.raw))
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
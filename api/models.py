@@ -1,14 +1,19 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional
 from datetime import datetime
 
 class GenerationRequest(BaseModel):
     prompt: str
+    target_count: Optional[int] = Field(default=None, ge=1, le=5000)
+    timeout_seconds: Optional[float] = Field(default=None, gt=0, le=3600)
+    pipeline: Optional[str] = Field(default=None, description="Pipeline name from PIPELINE_DIR, e.g. for A/B tests")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Low priority requests are shed first under load")
 
 class GenerationResponse(BaseModel):
     task_id: str
     status: str
     message: str
+    coalesced: bool = False
 
 class GenerationResult(BaseModel):
     task_id: str
@@ -24,6 +29,29 @@ class TaskStatus(BaseModel):
     progress: Dict[str, Any]
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    total_leads: int = 0
+    total_emails: int = 0
+    next_cursor: Optional[str] = None
+
+class TaskSummary(BaseModel):
+    task_id: str
+    status: str
+    prompt: str
+    target_count: Optional[int] = None
+    pipeline: Optional[str] = None
+    priority: str = "normal"
+    coalesced_requests: int = 0
+    progress: Dict[str, Any]
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    total_leads: int = 0
+    total_emails: int = 0
+
+class TaskList(BaseModel):
+    tasks: List[TaskSummary]
+    total: int
+    next_cursor: Optional[str] = None
 
 class Lead(BaseModel):
     company: str
@@ -31,8 +59,13 @@ class Lead(BaseModel):
     description: str
     products: str
     match: str
+    capability: str = ""
+    match_score: Optional[float] = None
+    score: Optional[float] = None
+    site_text: str = ""
 
 class Email(BaseModel):
     company: str
     subject: str
-    email: str
\ No newline at end of file
+    email: str
+    template_id: str = ""
\ No newline at end of file
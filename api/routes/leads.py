@@ -1,32 +1,46 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
+from typing import Optional
 from ..models import GenerationRequest, GenerationResponse
-from ..services.lead_service import LeadService
-import uuid
+from ..services.lead_service import lead_service
 
 router = APIRouter(prefix="/leads", tags=["leads"])
-lead_service = LeadService()
 
 @router.post("/generate", response_model=GenerationResponse)
 async def generate_leads(
     request: GenerationRequest, 
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")
 ):
     """Start lead generation process"""
     
     if not request.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
     
-    task_id = str(uuid.uuid4())
+    task, is_new = lead_service.create_task(
+        request.prompt, request.target_count, idempotency_key, request.pipeline,
+        priority=request.priority, timeout_seconds=request.timeout_seconds
+    )
+    
+    if not is_new:
+        return GenerationResponse(
+            task_id=task["task_id"],
+            status=task["status"],
+            message="Attached to existing lead generation task",
+            coalesced=True
+        )
     
     # Start background task
     background_tasks.add_task(
         lead_service.run_lead_generation, 
-        task_id, 
-        request.prompt
+        task["task_id"], 
+        request.prompt,
+        request.target_count,
+        request.timeout_seconds,
+        request.pipeline
     )
     
     return GenerationResponse(
-        task_id=task_id,
+        task_id=task["task_id"],
         status="queued",
         message="Lead generation started"
     )
@@ -34,4 +48,4 @@ async def generate_leads(
 @router.get("/export/{task_id}")
 async def export_results(task_id: str, format: str = "json"):
     """Export task results"""
-    return await lead_service.export_results(task_id, format)
\ No newline at end of file
+    return await lead_service.export_results(task_id, format)
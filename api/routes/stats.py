@@ -0,0 +1,11 @@
+from typing import Optional
+from fastapi import APIRouter, Query
+from ..services.lead_service import lead_service
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+@router.get("/")
+async def get_stats(window: int = Query(default=15, ge=1, le=60, description="Rolling window in minutes"),
+                    pipeline: Optional[str] = Query(default=None, description="Only tasks run with this pipeline")):
+    """Runs, cost, throughput, stage latency and parse failures over recent tasks"""
+    return await lead_service.get_stats(window, pipeline)
@@ -1,21 +1,27 @@
-from fastapi import APIRouter, HTTPException
-from ..models import TaskStatus
-from ..services.lead_service import LeadService
+from typing import Optional
+from fastapi import APIRouter, Header, Query
+from ..models import TaskStatus, TaskList
+from ..services.lead_service import lead_service, DEFAULT_TASK_PAGE
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
-lead_service = LeadService()
 
 @router.get("/{task_id}", response_model=TaskStatus)
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str,
+                          cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+                          limit: Optional[int] = Query(default=None, ge=1, le=5000, description="Leads and emails per page; unset returns all"),
+                          fields: Optional[str] = Query(default=None, description="e.g. leads,emails.company,emails.subject"),
+                          if_none_match: Optional[str] = Header(default=None)):
     """Get task status and results"""
-    return await lead_service.get_task_status(task_id)
+    return await lead_service.get_task_status(task_id, cursor, limit, fields, if_none_match)
 
-@router.get("/")
-async def get_all_tasks():
-    """Get all tasks (for debugging)"""
-    return await lead_service.get_all_tasks()
+@router.get("/", response_model=TaskList)
+async def get_all_tasks(cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+                        limit: int = Query(default=DEFAULT_TASK_PAGE, ge=1, le=1000),
+                        if_none_match: Optional[str] = Header(default=None)):
+    """List task summaries (for debugging)"""
+    return await lead_service.get_all_tasks(cursor, limit, if_none_match)
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: str):
-    """Delete a task"""
-    return await lead_service.delete_task(task_id)
\ No newline at end of file
+async def delete_task(task_id: str, idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")):
+    """Delete a task once every caller attached to it has deleted it"""
+    return await lead_service.delete_task(task_id, idempotency_key)
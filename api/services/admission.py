@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import get_admission_config
+
+# Lower rank runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+# Smoothing of the per-call latency and error signals
+LATENCY_ALPHA = 0.2
+ERROR_ALPHA = 0.1
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent orchestrator runs, with a priority queue and load shedding
+
+    Every LLM call reports its latency and whether it failed. While average latency stays
+    under target and errors are rare, a saturated limit grows by about one run per `limit`
+    healthy calls; a slow or failing provider cuts it by `decrease_factor`, at most once per
+    target latency. Runs beyond the limit wait in a priority queue, and a run that would have to
+    wait and could then not finish within its SLA behind the runs ahead of it is shed, whether
+    it is new or already queued. Lower priorities see a longer backlog, so they are shed first.
+    A run that can start right away is never shed, so an idle service always admits work and a
+    stale estimate from one slow run is corrected by the next.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32, target_latency: float = 10.0,
+                 max_error_rate: float = 0.2, decrease_factor: float = 0.7, max_queue: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.decrease_factor = decrease_factor
+        self.max_queue = max_queue
+        self.clock = clock
+        # Smoothed LLM call latency and error rate, and smoothed duration of a whole run
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.run_seconds: Optional[float] = None
+        self.in_flight = 0
+        self.shed = 0
+        # Heap of (rank, seq, task_id, future, sla, enqueued_at)
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_decrease = -math.inf
+
+    @classmethod
+    def from_config(cls) -> "AdaptiveConcurrencyLimiter":
+        return cls(**get_admission_config())
+
+    @property
+    def slots(self) -> int:
+        return max(1, int(self.limit))
+
+    def observe_call(self, duration: float, ok: bool):
+        """Feed one LLM call into the limit; safe to call from any thread"""
+        with self._lock:
+            self.latency = duration if self.latency is None else self.latency + LATENCY_ALPHA * (duration - self.latency)
+            self.error_rate += ERROR_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+            slots = self.slots
+            if self.latency > self.target_latency or self.error_rate > self.max_error_rate:
+                now = self.clock()
+                if now - self._last_decrease >= self.target_latency:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif self.in_flight >= slots:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            changed = self.slots != slots
+        if changed:
+            self._schedule()
+
+    def observe_run(self, duration: float):
+        """Feed the duration of a finished run into the backlog estimate"""
+        with self._lock:
+            self.run_seconds = duration if self.run_seconds is None else self.run_seconds + LATENCY_ALPHA * (duration - self.run_seconds)
+
+    def _wait_estimate(self, ahead: int) -> float:
+        """Seconds until a run with `ahead` runs in front of it can start"""
+        if ahead < self.slots or not self.run_seconds:
+            return 0.0
+        return ((ahead - self.slots) // self.slots + 1) * self.run_seconds
+
+    def check(self, priority: str, sla: float) -> Optional[str]:
+        """Reason to shed a new request, or None to accept it"""
+        rank = PRIORITIES[priority]
+        with self._lock:
+            if len(self._waiters) >= self.max_queue:
+                return f"queue is full ({self.max_queue} waiting runs)"
+            if self.run_seconds is None:
+                return None
+            ahead = self.in_flight + sum(1 for waiter in self._waiters if waiter[0] <= rank)
+            wait = self._wait_estimate(ahead)
+            finish = wait + self.run_seconds
+        if wait and finish > sla:
+            return f"backlog would not finish within {sla:.0f}s (estimated {finish:.0f}s)"
+        return None
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait before retrying"""
+        return max(1, math.ceil(self.run_seconds or self.target_latency))
+
+    async def acquire(self, task_id: str, priority: str, sla: float) -> bool:
+        """Wait for a run slot; False means the run was shed or discarded while queued"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._loop = loop
+            if self.in_flight < self.slots and not self._waiters:
+                self.in_flight += 1
+                return True
+            future = loop.create_future()
+            heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._seq), task_id, future, sla, self.clock()))
+        return await future
+
+    def release(self):
+        """Free the slot of a finished run"""
+        with self._lock:
+            self.in_flight -= 1
+        self._schedule()
+
+    def discard(self, task_id: str):
+        """Drop a queued run, e.g. one deleted before it started"""
+        with self._lock:
+            for waiter in self._waiters:
+                if waiter[2] == task_id and not waiter[3].done():
+                    waiter[3].set_result(False)
+            self._waiters = [waiter for waiter in self._waiters if not waiter[3].done()]
+            heapq.heapify(self._waiters)
+
+    def _schedule(self):
+        """Run _dispatch on the event loop that owns the waiting futures"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._dispatch)
+
+    def _dispatch(self):
+        """Shed queued runs that would still have to wait and can no longer make their SLA, then start runs up to the limit"""
+        with self._lock:
+            now = self.clock()
+            if self.run_seconds:
+                position = 0
+                for _, _, _, future, sla, enqueued_at in sorted(self._waiters):
+                    if future.done():
+                        continue
+                    wait = self._wait_estimate(self.in_flight + position)
+                    if wait and wait + self.run_seconds > sla - (now - enqueued_at):
+                        future.set_result(False)
+                        self.shed += 1
+                    else:
+                        position += 1
+                self._waiters = [waiter for waiter in self._waiters if not waiter[3].done()]
+                heapq.heapify(self._waiters)
+
+            while self._waiters and self.in_flight < self.slots:
+                future = heapq.heappop(self._waiters)[3]
+                if not future.done():
+                    self.in_flight += 1
+                    future.set_result(True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit and the signals it is based on"""
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "llm_latency_seconds": round(self.latency, 3) if self.latency is not None else None,
+                "llm_error_rate": round(self.error_rate, 4),
+                "run_seconds": round(self.run_seconds, 2) if self.run_seconds is not None else None,
+                "shed_while_queued": self.shed,
+            }
@@ -1,141 +1,347 @@
 import asyncio
+import hashlib
+import io
+import itertools
+import json
 import os
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
 
 # Import your existing orchestrator
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.core.orchestrator import LeadGenOrchestrator
+from src.core.deadline import Deadline, RunCancelled
+from src.config import get_timeout_config, pipeline_path
+from src.utils import save_leads_to_csv, save_leads_to_excel
+from .stats import StatsAggregator
+from .admission import AdaptiveConcurrencyLimiter
+from .pagination import decode_cursor, encode_cursor, etag_matches, make_etag, parse_fields, project
+
+ACTIVE_STATUSES = ("queued", "running")
+# Page size of GET /tasks/ when the client does not pass a limit
+DEFAULT_TASK_PAGE = 50
+
+
+def request_fingerprint(prompt: str, target_count: Optional[int], pipeline: Optional[str] = None) -> str:
+    """Key identifying equivalent requests: normalized prompt plus the pipeline config it runs with"""
+    normalized_prompt = " ".join(prompt.lower().split()).rstrip(".!?")
+    config = {
+        "target_count": target_count,
+        "pipeline": pipeline,
+        "pipeline_file": os.getenv("PIPELINE_FILE"),
+        "email_mode": os.getenv("EMAIL_MODE", "template").lower(),
+        "match_mode": os.getenv("MATCH_MODE", "embedding").lower(),
+        "email_top_k": os.getenv("EMAIL_TOP_K"),
+    }
+    payload = json.dumps({"prompt": normalized_prompt, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 class LeadService:
     def __init__(self):
         self.generation_tasks = {}
-        self.mock_data = self._get_mock_data()
+        # Creation order of tasks, which task list cursors point into
+        self.task_seq = itertools.count(1)
+        # Fingerprint -> task_id of the in-flight run that identical requests attach to
+        self.inflight = {}
+        # Idempotency-Key -> (fingerprint, task_id)
+        self.idempotency_keys = {}
+        # task_id -> Deadline of the running orchestrator, used to cancel it
+        self.deadlines = {}
+        self.stats = StatsAggregator()
+        # Pipeline name -> statistics of its tasks, for comparing pipelines
+        self.pipeline_stats = defaultdict(StatsAggregator)
+        # Limits concurrent orchestrator runs by provider health and sheds what cannot finish in time
+        self.admission = AdaptiveConcurrencyLimiter.from_config()
+        # Orchestrator runs block a thread each, so the pool is sized to the admission limit
+        self.executor = ThreadPoolExecutor(max_workers=self.admission.max_limit, thread_name_prefix="orchestrator")
     
-    def _get_mock_data(self):
-        """Mock data for development"""
-        return {
-            "leads": [
-                {
-                    "company": "Texas Instruments",
-                    "website": "ti.com",
-                    "description": "Leading semiconductor manufacturer with global operations",
-                    "products": "Microcontrollers, processors, analog chips",
-                    "match": "Vision AI for quality control in semiconductor fabrication processes"
-                },
-                {
-                    "company": "Dell Technologies",
-                    "website": "dell.com",
-                    "description": "Multinational computer technology company",
-                    "products": "Laptops, servers, storage solutions",
-                    "match": "Automation for assembly line optimization and component inspection"
-                }
-            ],
-            "emails": [
-                {
-                    "company": "Texas Instruments",
-                    "subject": "Partnership Opportunity - Vision AI for Semiconductor Manufacturing",
-                    "email": "Subject: Partnership Opportunity - Vision AI for Semiconductor Manufacturing\n\nDear Texas Instruments Team,\n\nI hope this email finds you well..."
-                }
-            ]
+    def create_task(self, prompt: str, target_count: Optional[int] = None,
+                    idempotency_key: Optional[str] = None, pipeline: Optional[str] = None,
+                    priority: str = "normal", timeout_seconds: Optional[float] = None) -> Tuple[Dict[str, Any], bool]:
+        """Register a generation request, returning (task, is_new)
+        
+        Requests with a known Idempotency-Key get their original task back, and requests
+        identical to one that is still queued or running attach to it instead of starting
+        another orchestrator run. New runs that the current backlog could not finish within
+        their deadline are shed with a 503.
+        """
+        try:
+            pipeline_path(pipeline)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        fingerprint = request_fingerprint(prompt, target_count, pipeline)
+        
+        if idempotency_key and idempotency_key in self.idempotency_keys:
+            known_fingerprint, task_id = self.idempotency_keys[idempotency_key]
+            if known_fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            if task_id in self.generation_tasks:
+                return self.generation_tasks[task_id], False
+        
+        leader_id = self.inflight.get(fingerprint)
+        if leader_id in self.generation_tasks and self.generation_tasks[leader_id]["status"] in ACTIVE_STATUSES:
+            task = self.generation_tasks[leader_id]
+            task["coalesced_requests"] += 1
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = (fingerprint, leader_id)
+            return task, False
+        
+        shed_reason = self.admission.check(priority, timeout_seconds or get_timeout_config()["request"])
+        if shed_reason:
+            self.stats.record_shed()
+            raise HTTPException(
+                status_code=503,
+                detail=f"Shed under load: {shed_reason}",
+                headers={"Retry-After": str(self.admission.retry_after())}
+            )
+        
+        task_id = str(uuid.uuid4())
+        task = {
+            "task_id": task_id,
+            "seq": next(self.task_seq),
+            "status": "queued",
+            "prompt": prompt,
+            "target_count": target_count,
+            "pipeline": pipeline,
+            "priority": priority,
+            "fingerprint": fingerprint,
+            "coalesced_requests": 0,
+            "created_at": datetime.now(),
+            "progress": {
+                "current_step": "Queued",
+                "steps_completed": 0,
+                "total_steps": 5
+            }
         }
+        self.generation_tasks[task_id] = task
+        self.inflight[fingerprint] = task_id
+        if idempotency_key:
+            self.idempotency_keys[idempotency_key] = (fingerprint, task_id)
+        return task, True
     
-    async def run_lead_generation(self, task_id: str, prompt: str):
+    async def run_lead_generation(self, task_id: str, prompt: str, target_count: Optional[int] = None,
+                                  timeout_seconds: Optional[float] = None, pipeline: Optional[str] = None):
         """Run lead generation in background"""
+        task = self.generation_tasks.get(task_id)
+        if task is None:
+            # Deleted before it started
+            return
+        
+        timeouts = get_timeout_config()
+        task["progress"]["current_step"] = "Waiting for capacity"
+        if not await self.admission.acquire(task_id, task.get("priority", "normal"), timeout_seconds or timeouts["request"]):
+            if task_id in self.generation_tasks:
+                task["status"] = "shed"
+                task["error"] = "Shed under load: the backlog would not finish within the deadline, retry later"
+                task["completed_at"] = datetime.now()
+                self._release_inflight(task_id)
+                self.stats.record_shed()
+            return
+        if task_id not in self.generation_tasks:
+            # Deleted while it was waiting for capacity
+            self.admission.release()
+            return
+        
+        deadline = Deadline(timeout_seconds or timeouts["request"], timeouts["stage"])
+        self.deadlines[task_id] = deadline
+        started = time.monotonic()
+        
         try:
-            # Initialize task
-            self.generation_tasks[task_id] = {
-                "task_id": task_id,
-                "status": "running",
-                "prompt": prompt,
-                "created_at": datetime.now(),
-                "progress": {
-                    "current_step": "Initializing agents",
-                    "steps_completed": 0,
-                    "total_steps": 5
-                }
-            }
+            task["status"] = "running"
+            task["progress"]["current_step"] = "Running AI agents"
             
-            USE_MOCK_DATA = os.getenv("USE_MOCK_DATA", "true").lower() == "true"
+            # LLM_BACKEND=simulation answers every agent with synthetic replies, e.g. for load tests
+            orchestrator = LeadGenOrchestrator(observer=self.admission.observe_call)
+            # Concurrent runs must not share output files; results are kept and exported per task
+            orchestrator.save_outputs = False
             
-            if USE_MOCK_DATA:
-                # Simulate the generation process
-                steps = [
-                    "Initializing agents",
-                    "Researching companies", 
-                    "Matching solutions",
-                    "Generating leads",
-                    "Creating emails"
-                ]
-                
-                for i, step in enumerate(steps):
-                    self.generation_tasks[task_id]["progress"] = {
-                        "current_step": step,
-                        "steps_completed": i + 1,
-                        "total_steps": len(steps)
-                    }
-                    await asyncio.sleep(1)
-                
-                leads = self.mock_data["leads"]
-                emails = self.mock_data["emails"]
-            else:
-                # Use actual orchestrator
-                self.generation_tasks[task_id]["progress"]["current_step"] = "Running AI agents"
-                
-                orchestrator = LeadGenOrchestrator()
-                
-                # Run orchestrator in executor to avoid blocking
-                results = await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: orchestrator.generate_leads(prompt)
-                )
-                
-                leads = results.get("leads", [])
-                emails = results.get("emails", [])
+            # Run orchestrator in executor to avoid blocking
+            results = await asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                lambda: orchestrator.generate_leads(prompt, target_count=target_count, deadline=deadline,
+                                                    pipeline=pipeline)
+            )
             
-            # Store results
-            self.generation_tasks[task_id]["status"] = "completed"
-            self.generation_tasks[task_id]["result"] = {
-                "leads": leads,
-                "emails": emails
+            # Store results; runs stopped by the deadline keep the leads validated so far
+            if deadline.cancelled:
+                task["status"] = "cancelled"
+            elif results.get("partial"):
+                task["status"] = "partial"
+                task["error"] = results.get("stopped_reason")
+            else:
+                task["status"] = "completed"
+            task["result"] = {
+                "leads": results.get("leads", []),
+                "emails": results.get("emails", [])
             }
-            self.generation_tasks[task_id]["completed_at"] = datetime.now()
+            task["metrics"] = results.get("metrics")
+            # Name of the pipeline that actually ran, e.g. the one in PIPELINE_FILE
+            task["pipeline"] = results.get("pipeline") or pipeline
+            task["recording"] = results.get("recording")
+            task["completed_at"] = datetime.now()
             
+        except RunCancelled as e:
+            task["status"] = "cancelled"
+            task["error"] = str(e)
+            task["completed_at"] = datetime.now()
+        
         except Exception as e:
-            self.generation_tasks[task_id]["status"] = "failed"
-            self.generation_tasks[task_id]["error"] = str(e)
-            self.generation_tasks[task_id]["completed_at"] = datetime.now()
+            task["status"] = "failed"
+            task["error"] = str(e)
+            task["completed_at"] = datetime.now()
+        
+        finally:
+            self.admission.release()
+            if task["status"] in ("completed", "partial"):
+                self.admission.observe_run(time.monotonic() - started)
+            self.deadlines.pop(task_id, None)
+            self._release_inflight(task_id)
+            self.stats.record_task(task)
+            self.pipeline_stats[task.get("pipeline") or "default"].record_task(task)
+    
+    def _release_inflight(self, task_id: str):
+        """Stop attaching new identical requests to a finished or deleted task"""
+        task = self.generation_tasks.get(task_id)
+        if task and self.inflight.get(task["fingerprint"]) == task_id:
+            del self.inflight[task["fingerprint"]]
+    
+    def cancel_task(self, task_id: str) -> bool:
+        """Cancel a running task, aborting its in-flight LLM calls"""
+        deadline = self.deadlines.get(task_id)
+        if deadline is None:
+            return False
+        deadline.cancel()
+        return True
     
-    async def get_task_status(self, task_id: str):
-        """Get task status and results"""
+    async def get_task_status(self, task_id: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                              fields: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+        """Get task status and a page of its results
+        
+        Without `limit` all leads and emails are returned. With it, leads and emails are paged
+        together and `next_cursor` resumes after the current page. `fields` selects collections
+        and fields (see parse_fields). Results do not change once stored, so the ETag is built
+        from the task state and the query alone and unchanged polls get a 304 without the
+        result being serialized.
+        """
         if task_id not in self.generation_tasks:
             raise HTTPException(status_code=404, detail="Task not found")
+        try:
+            offset = decode_cursor(cursor, task_id)
+            selected = parse_fields(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         task = self.generation_tasks[task_id]
+        etag = make_etag(task_id, task["status"], task["progress"], task.get("error"), task.get("completed_at"),
+                         offset, limit, selected)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return {
+        result = task.get("result")
+        body = {
             "task_id": task_id,
             "status": task["status"],
             "progress": task["progress"],
-            "result": task.get("result"),
-            "error": task.get("error")
+            "result": None,
+            "error": task.get("error"),
+            "total_leads": len(result["leads"]) if result else 0,
+            "total_emails": len(result["emails"]) if result else 0,
+            "next_cursor": None
         }
+        if result:
+            end = offset + limit if limit is not None else None
+            body["result"] = {
+                collection: [project(record, names) for record in result[collection][offset:end]]
+                for collection, names in selected.items()
+            }
+            if end is not None and end < max(body["total_leads"], body["total_emails"]):
+                body["next_cursor"] = encode_cursor(task_id, end)
+        return JSONResponse(body, headers={"ETag": etag})
+    
+    async def get_stats(self, window_minutes: int = 15, pipeline: Optional[str] = None):
+        """Fleet-level statistics over finished tasks, optionally only those of one pipeline"""
+        if pipeline is None:
+            return dict(self.stats.snapshot(window_minutes), admission=self.admission.snapshot())
+        if pipeline not in self.pipeline_stats:
+            raise HTTPException(status_code=404, detail=f"No finished tasks for pipeline '{pipeline}'")
+        return self.pipeline_stats[pipeline].snapshot(window_minutes)
     
-    async def get_all_tasks(self):
-        """Get all tasks"""
+    async def get_all_tasks(self, cursor: Optional[str] = None, limit: int = DEFAULT_TASK_PAGE,
+                            if_none_match: Optional[str] = None) -> Response:
+        """Page of task summaries in creation order; results are fetched per task with get_task_status"""
+        try:
+            after = decode_cursor(cursor, "tasks")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        tasks = [task for task in self.generation_tasks.values() if task["seq"] > after]
+        page = tasks[:limit]
+        next_cursor = encode_cursor("tasks", page[-1]["seq"]) if len(tasks) > limit else None
+        etag = make_etag(len(self.generation_tasks), next_cursor, [
+            (task["task_id"], task["status"], task["progress"], task.get("coalesced_requests")) for task in page
+        ])
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        return JSONResponse({
+            "tasks": [self._summarize_task(task) for task in page],
+            "total": len(self.generation_tasks),
+            "next_cursor": next_cursor
+        }, headers={"ETag": etag})
+    
+    @staticmethod
+    def _summarize_task(task: Dict[str, Any]) -> Dict[str, Any]:
+        """Task fields for listings, with result counts instead of the results"""
+        result = task.get("result")
+        completed_at = task.get("completed_at")
         return {
-            "tasks": list(self.generation_tasks.values()),
-            "total": len(self.generation_tasks)
+            "task_id": task["task_id"],
+            "status": task["status"],
+            "prompt": task["prompt"],
+            "target_count": task["target_count"],
+            "pipeline": task["pipeline"],
+            "priority": task["priority"],
+            "coalesced_requests": task["coalesced_requests"],
+            "progress": task["progress"],
+            "error": task.get("error"),
+            "created_at": task["created_at"].isoformat(),
+            "completed_at": completed_at.isoformat() if completed_at else None,
+            "total_leads": len(result["leads"]) if result else 0,
+            "total_emails": len(result["emails"]) if result else 0
         }
     
-    async def delete_task(self, task_id: str):
-        """Delete a task"""
+    async def delete_task(self, task_id: str, idempotency_key: Optional[str] = None):
+        """Delete a task, or only detach the caller while other callers are attached to it
+        
+        Identical and idempotent requests share one task, so a DELETE from one of them only
+        drops that caller (and its Idempotency-Key, when sent); the run is cancelled and the
+        task removed once the last caller has deleted it.
+        """
         if task_id not in self.generation_tasks:
             raise HTTPException(status_code=404, detail="Task not found")
         
+        task = self.generation_tasks[task_id]
+        if idempotency_key and self.idempotency_keys.get(idempotency_key, (None, None))[1] == task_id:
+            del self.idempotency_keys[idempotency_key]
+        if task["coalesced_requests"] > 0:
+            task["coalesced_requests"] -= 1
+            return {"message": "Detached from task", "remaining_callers": task["coalesced_requests"] + 1}
+        
+        self.cancel_task(task_id)
+        self.admission.discard(task_id)
+        self._release_inflight(task_id)
         del self.generation_tasks[task_id]
+        self.idempotency_keys = {
+            key: value for key, value in self.idempotency_keys.items() if value[1] != task_id
+        }
         return {"message": "Task deleted"}
     
     async def export_results(self, task_id: str, format: str = "json"):
@@ -145,7 +351,7 @@ class LeadService:
         
         task = self.generation_tasks[task_id]
         
-        if task["status"] != "completed":
+        if task["status"] not in ("completed", "partial"):
             raise HTTPException(status_code=400, detail="Task not completed")
         
         if format not in ["json", "csv", "xlsx"]:
@@ -159,5 +365,23 @@ class LeadService:
                 "emails": result["emails"]
             }
         
-        # For CSV/Excel, implement conversion logic here
-        return result
\ No newline at end of file
+        if format == "csv":
+            buffer = io.StringIO()
+            save_leads_to_csv(result["leads"], buffer)
+            return Response(
+                content=buffer.getvalue(),
+                media_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="leads_{task_id}.csv"'}
+            )
+        
+        buffer = io.BytesIO()
+        save_leads_to_excel(result["leads"], buffer, emails=result["emails"])
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": f'attachment; filename="leads_{task_id}.xlsx"'}
+        )
+
+
+# Shared by all routers so tasks, in-flight runs and idempotency keys are visible everywhere
+lead_service = LeadService()
@@ -0,0 +1,89 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils import LEAD_FIELDS, EMAIL_FIELDS
+
+# Result collections and the fields `fields=` can select from each
+COLLECTIONS = {"leads": LEAD_FIELDS, "emails": EMAIL_FIELDS}
+
+
+def encode_cursor(scope: str, position: int) -> str:
+    """Opaque cursor for resuming a listing after `position`"""
+    payload = json.dumps({"s": scope, "p": position}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], scope: str) -> int:
+    """Position stored in a cursor from encode_cursor; 0 without a cursor
+
+    Raises ValueError for malformed cursors and cursors issued for another listing.
+    """
+    if not cursor:
+        return 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = payload["p"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if payload.get("s") != scope or not isinstance(position, int) or position < 0:
+        raise ValueError("Cursor does not belong to this listing")
+    return position
+
+
+def parse_fields(fields: Optional[str]) -> Dict[str, Tuple[str, ...]]:
+    """Fields to return per collection from a `fields=` value
+
+    `leads` or `emails` select a whole collection, `leads.company` a single field of one, and a
+    bare name like `company` that field in every collection that has it. Collections without
+    any selected field are left out. Raises ValueError for unknown names.
+    """
+    if not fields:
+        return dict(COLLECTIONS)
+    selected: Dict[str, list] = {}
+    for name in filter(None, (part.strip() for part in fields.split(","))):
+        collection, _, field = name.rpartition(".")
+        if not collection and field in COLLECTIONS:
+            selected[field] = list(COLLECTIONS[field])
+            continue
+        if collection:
+            if field not in COLLECTIONS.get(collection, ()):
+                raise ValueError(f"Unknown field '{name}'")
+            targets = [collection]
+        else:
+            targets = [key for key, names in COLLECTIONS.items() if field in names]
+            if not targets:
+                raise ValueError(f"Unknown field '{name}'")
+        for target in targets:
+            names = selected.setdefault(target, [])
+            if field not in names:
+                names.append(field)
+    return {collection: tuple(names) for collection, names in selected.items()}
+
+
+def project(record: Any, names: Tuple[str, ...]) -> Dict[str, Any]:
+    """Selected fields of a lead or email, whether a record or a plain dict"""
+    if isinstance(record, dict):
+        return {name: record.get(name) for name in names}
+    return {name: getattr(record, name) for name in names}
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the values a response is built from
+
+    Weak because the same representation is also served compressed.
+    """
+    payload = json.dumps(parts, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag`, using weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import get_pricing_config
+
+# One-minute buckets covering the longest window that can be queried
+BUCKET_SECONDS = 60
+WINDOW_BUCKETS = 60
+# Latency samples kept per agent for percentiles
+LATENCY_SAMPLES = 2048
+
+COUNTERS = (
+    "runs", "completed", "partial", "failed", "cancelled", "shed",
+    "leads", "emails", "llm_calls", "prompt_tokens", "completion_tokens", "cached_prompt_tokens", "cost_usd"
+)
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[index], 4)
+
+
+def _ratio(numerator: float, denominator: float, digits: int = 4) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+class StatsAggregator:
+    """Fleet-level run statistics, updated once per finished task
+
+    Counters go into a ring of per-minute buckets and latencies into bounded per-agent
+    ring buffers, so recording and querying cost the same however long the service runs.
+    """
+
+    def __init__(self, pricing: Optional[Dict[str, float]] = None, clock: Callable[[], float] = time.time):
+        self.pricing = pricing or get_pricing_config()
+        self.clock = clock
+        self.started_at = clock()
+        self._buckets: List[Optional[Dict[str, Any]]] = [None] * WINDOW_BUCKETS
+        self._totals = self._empty_bucket(None)
+        self._latency = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_bucket(minute: Optional[int]) -> Dict[str, Any]:
+        return {"minute": minute, "counters": dict.fromkeys(COUNTERS, 0), "parse": {}}
+
+    def _bucket(self, now: float) -> Dict[str, Any]:
+        """Bucket for the current minute, recycling the slot of the minute an hour ago"""
+        minute = int(now // BUCKET_SECONDS)
+        slot = minute % WINDOW_BUCKETS
+        bucket = self._buckets[slot]
+        if bucket is None or bucket["minute"] != minute:
+            bucket = self._buckets[slot] = self._empty_bucket(minute)
+        return bucket
+
+    def cost(self, metrics: Dict[str, Any]) -> float:
+        """Estimated USD cost of a run from its token counts"""
+        return (metrics.get("prompt_tokens", 0) * self.pricing["input"]
+                + metrics.get("completion_tokens", 0) * self.pricing["output"]) / 1_000_000
+
+    def record_task(self, task: Dict[str, Any]):
+        """Add a finished task to the statistics"""
+        result = task.get("result") or {}
+        metrics = task.get("metrics") or {}
+        values = {
+            "runs": 1,
+            "leads": len(result.get("leads", [])),
+            "emails": len(result.get("emails", [])),
+            "llm_calls": metrics.get("llm_calls", 0),
+            "prompt_tokens": metrics.get("prompt_tokens", 0),
+            "completion_tokens": metrics.get("completion_tokens", 0),
+            "cached_prompt_tokens": metrics.get("cached_prompt_tokens", 0),
+            "cost_usd": self.cost(metrics),
+        }
+        if task["status"] in COUNTERS:
+            values[task["status"]] = 1
+
+        now = self.clock()
+        with self._lock:
+            bucket = self._bucket(now)
+            for target in (bucket, self._totals):
+                for key, value in values.items():
+                    target["counters"][key] += value
+                for agent, counts in metrics.get("parse_results", {}).items():
+                    parse = target["parse"].setdefault(agent, {"ok": 0, "failed": 0})
+                    parse["ok"] += counts.get("ok", 0)
+                    parse["failed"] += counts.get("failed", 0)
+            for agent, durations in metrics.get("stage_seconds", {}).items():
+                self._latency[agent].extend((now, duration) for duration in durations)
+
+    def record_shed(self):
+        """Count a request shed under load; it never ran, so it is not counted as a run"""
+        now = self.clock()
+        with self._lock:
+            self._bucket(now)["counters"]["shed"] += 1
+            self._totals["counters"]["shed"] += 1
+
+    def snapshot(self, window_minutes: int = 15) -> Dict[str, Any]:
+        """Statistics for the last `window_minutes` minutes and since startup"""
+        window_minutes = max(1, min(WINDOW_BUCKETS, window_minutes))
+        now = self.clock()
+        oldest_minute = int(now // BUCKET_SECONDS) - window_minutes + 1
+        since = now - window_minutes * BUCKET_SECONDS
+
+        with self._lock:
+            window = self._empty_bucket(None)
+            for bucket in self._buckets:
+                if bucket is None or bucket["minute"] < oldest_minute:
+                    continue
+                for key, value in bucket["counters"].items():
+                    window["counters"][key] += value
+                for agent, counts in bucket["parse"].items():
+                    parse = window["parse"].setdefault(agent, {"ok": 0, "failed": 0})
+                    parse["ok"] += counts["ok"]
+                    parse["failed"] += counts["failed"]
+            totals = {"counters": dict(self._totals["counters"]),
+                      "parse": {agent: dict(counts) for agent, counts in self._totals["parse"].items()}}
+            window_latency = {agent: sorted(d for t, d in samples if t >= since) for agent, samples in self._latency.items()}
+            all_latency = {agent: sorted(d for _, d in samples) for agent, samples in self._latency.items()}
+
+        uptime_minutes = (now - self.started_at) / 60
+        return {
+            "window": self._report(window, window_latency, min(window_minutes, max(1.0, uptime_minutes)), window_minutes),
+            "totals": self._report(totals, all_latency, max(1.0, uptime_minutes), None),
+        }
+
+    @staticmethod
+    def _report(bucket: Dict[str, Any], latency: Dict[str, List[float]], minutes: float,
+                window_minutes: Optional[int]) -> Dict[str, Any]:
+        counters = bucket["counters"]
+        leads = counters["leads"]
+        return {
+            "window_minutes": window_minutes,
+            "runs": counters["runs"],
+            "runs_per_minute": round(counters["runs"] / minutes, 4),
+            "statuses": {status: counters[status] for status in ("completed", "partial", "failed", "cancelled")},
+            "shed": counters["shed"],
+            "leads": leads,
+            "emails": counters["emails"],
+            "cost_usd": round(counters["cost_usd"], 6),
+            "leads_per_dollar": _ratio(leads, counters["cost_usd"], 2),
+            "llm_calls_per_lead": _ratio(counters["llm_calls"], leads),
+            "tokens_per_lead": _ratio(counters["prompt_tokens"] + counters["completion_tokens"], leads, 1),
+            "prompt_cache_hit_rate": _ratio(counters["cached_prompt_tokens"], counters["prompt_tokens"]),
+            "stage_latency": {
+                agent: {
+                    "samples": len(values),
+                    "p50": percentile(values, 50),
+                    "p90": percentile(values, 90),
+                    "p99": percentile(values, 99),
+                }
+                for agent, values in latency.items() if values
+            },
+            "parse_failure_rate": {
+                agent: _ratio(counts["failed"], counts["ok"] + counts["failed"])
+                for agent, counts in bucket["parse"].items()
+            },
+        }
@@ -0,0 +1,110 @@
+"""Benchmark website enrichment against a local HTTP fixture server
+
+    python -m benchmarks.enrichment_fixture --pages 2000 --page-kb 20
+    python -m benchmarks.enrichment_fixture --pages 2000 --latency 0.5 --cancel-after 1
+
+The fixture serves a robots.txt and one homepage per lead, answers If-None-Match with 304,
+and can add latency per response, so fetching, streaming, parsing, caching, revalidation
+and cancellation run as they would against real sites, without network access.
+"""
+
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import typer
+
+from src.core.deadline import Deadline, RunCancelled
+from src.core.enrichment import WebsiteEnricher
+from src.utils import LeadRecord
+
+app = typer.Typer()
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        """Clients that hang up mid-response, e.g. cancelled fetches, are expected"""
+
+
+def fixture_server(page_kb: int, latency: float, crawl_delay: float) -> FixtureServer:
+    """Start a loopback server with a robots.txt and a homepage per path"""
+    filler = b"<p>Regional manufacturer of packaging, bottling lines and automated assembly.</p>"
+    robots = b"User-agent: *\nDisallow: /private\n" + (f"Crawl-delay: {crawl_delay}\n".encode() if crawl_delay else b"")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if self.path == "/robots.txt":
+                self._send(200, robots, "text/plain")
+                return
+            etag = f'"{self.path}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", "text/html", etag)
+                return
+            body = (f"<html><head><title>Company {self.path}</title>"
+                    f'<meta name="description" content="Homepage of {self.path}"></head><body>').encode()
+            body += filler * (page_kb * 1024 // len(filler)) + b"</body></html>"
+            self._send(200, body, "text/html; charset=utf-8", etag)
+
+        def _send(self, status: int, body: bytes, content_type: str, etag: Optional[str] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = FixtureServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@app.command()
+def main(
+    pages: int = typer.Option(2000, help="Number of leads, each with its own homepage"),
+    page_kb: int = typer.Option(20, help="Size of each homepage in KiB"),
+    latency: float = typer.Option(0.0, help="Seconds the fixture waits before each response"),
+    crawl_delay: float = typer.Option(0.0, help="Crawl-delay announced in robots.txt"),
+    concurrency: int = typer.Option(64, help="Concurrent fetches"),
+    per_host: int = typer.Option(64, help="Connections per host; all fixture pages share one host"),
+    cancel_after: Optional[float] = typer.Option(None, help="Cancel the run after this many seconds"),
+):
+    """Enrich leads from the fixture cold, then again revalidating the cache"""
+    server = fixture_server(page_kb, latency, crawl_delay)
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ("cold", "revalidate"):
+            leads = [LeadRecord(company=f"Company {i}", website=f"{base}/c{i}") for i in range(pages)]
+            # TTL 0 makes the second pass revalidate every cached page with If-None-Match
+            enricher = WebsiteEnricher(concurrency=concurrency, per_host=per_host, cache_dir=cache_dir, cache_ttl=0,
+                                       allow_private_hosts=True)
+            deadline = Deadline()
+            if cancel_after is not None:
+                threading.Timer(cancel_after, deadline.cancel).start()
+            started = time.monotonic()
+            try:
+                enriched = enricher.enrich(leads, deadline)
+            except RunCancelled:
+                enriched = sum(1 for lead in leads if lead.site_text)
+                label += ", cancelled"
+            elapsed = time.monotonic() - started
+            print(f"{label}: {enriched}/{pages} pages in {elapsed:.2f}s ({pages / elapsed:.0f} leads/s)")
+            if cancel_after is not None:
+                break
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    app()
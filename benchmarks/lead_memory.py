@@ -0,0 +1,67 @@
+"""Compare memory held by dict leads vs. LeadRecord/EmailRecord for a large batch
+
+    python -m benchmarks.lead_memory --count 50000
+"""
+
+import json
+import random
+import tracemalloc
+
+import typer
+
+from src.utils import LeadRecord, EmailRecord
+
+app = typer.Typer()
+
+COMPANY_WORDS = ["Precision", "Global", "Apex", "Sun", "Delta", "Metro", "United", "Prime", "Star", "Bharat"]
+INDUSTRY_WORDS = ["Plastics", "Foods", "Motors", "Electronics", "Packaging", "Textiles", "Steel", "Pharma"]
+
+
+def _payload(count: int) -> str:
+    """JSON shaped like LeadLogger/EmailAgent output, with repeated companies as in real merged runs"""
+    rng = random.Random(0)
+    names = [f"{rng.choice(COMPANY_WORDS)} {rng.choice(INDUSTRY_WORDS)} {i % (count // 4 or 1)}" for i in range(count)]
+    leads = [{
+        "company": name,
+        "website": f"https://www.{name.lower().replace(' ', '')}.com",
+        "description": f"{name} is a mid-sized manufacturer serving regional and export markets.",
+        "products": "Injection moulded parts, assemblies, packaging",
+        "match": "Vision AI for inline defect detection on moulding lines.",
+    } for name in names]
+    emails = [{
+        "company": name,
+        "email": f"Subject: Vision AI for {name}\n\nDear {name} Team,\n\nReplicant Systems can help.\n\nBest regards,\nReplicant Systems Team",
+    } for name in names]
+    return json.dumps({"leads": leads, "emails": emails})
+
+
+def _measure(payload: str, as_records: bool) -> int:
+    """Bytes retained by the parsed leads and emails"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = json.loads(payload)
+    if as_records:
+        data = {
+            "leads": [LeadRecord.from_dict(lead) for lead in data["leads"]],
+            "emails": [EmailRecord.from_dict(email) for email in data["emails"]],
+        }
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del data
+    return retained
+
+
+@app.command()
+def main(count: int = typer.Option(50000, help="Number of leads (and emails) to hold in memory")):
+    """Print retained memory for dicts vs. records"""
+    payload = _payload(count)
+    dict_bytes = _measure(payload, as_records=False)
+    record_bytes = _measure(payload, as_records=True)
+    print(f"leads+emails: {count}")
+    print(f"dicts:   {dict_bytes / 1e6:8.1f} MB ({dict_bytes / count:6.0f} B/lead)")
+    print(f"records: {record_bytes / 1e6:8.1f} MB ({record_bytes / count:6.0f} B/lead)")
+    print(f"reduction: {1 - record_bytes / dict_bytes:.0%}")
+
+
+if __name__ == "__main__":
+    app()
@@ -1,4 +1,5 @@
 import typer
+from typing import Optional
 from src.config import load_environment
 from src.core import LeadGenOrchestrator
 
@@ -9,14 +10,89 @@ load_environment()
 
 
 @app.command()
-def generate(prompt: str):
+def generate(
+    prompt: str,
+    count: Optional[int] = typer.Option(None, "--count", "-n", help="Target number of leads (enables chunked research)"),
+    pipeline: Optional[str] = typer.Option(None, "--pipeline", "-p", help="Pipeline name from PIPELINE_DIR")
+):
     """Generate leads and emails based on the given prompt"""
     try:
         orchestrator = LeadGenOrchestrator()
-        orchestrator.generate_leads(prompt)
+        orchestrator.generate_leads(prompt, target_count=count, pipeline=pipeline)
     except Exception as e:
         raise typer.Exit(1)
 
+@app.command()
+def replay(
+    path: str,
+    profile: bool = typer.Option(False, "--profile", help="Profile the replay and print the slowest functions"),
+    latency_scale: float = typer.Option(0.0, "--latency-scale", help="Sleep for this fraction of each recorded LLM latency")
+):
+    """Re-run a recorded run offline from its recording"""
+    if not profile:
+        LeadGenOrchestrator.replay(path, latency_scale=latency_scale)
+        return
+    
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.runcall(LeadGenOrchestrator.replay, path, latency_scale=latency_scale)
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+@app.command()
+def stats(
+    window: int = typer.Option(15, "--window", "-w", help="Rolling window in minutes (1-60)"),
+    url: str = typer.Option("http://localhost:8000", "--url", help="Base URL of the running API"),
+    pipeline: Optional[str] = typer.Option(None, "--pipeline", "-p", help="Only tasks run with this pipeline")
+):
+    """Show throughput, cost, stage latency and parse failures of the running API"""
+    import httpx
+    from rich.console import Console
+    from rich.table import Table
+    
+    console = Console()
+    try:
+        params = {"window": window, "pipeline": pipeline} if pipeline else {"window": window}
+        response = httpx.get(f"{url.rstrip('/')}/stats/", params=params, timeout=10)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        console.print(f"[red]Could not fetch stats from {url}: {e}[/red]")
+        raise typer.Exit(1)
+    data = response.json()
+    recent, totals = data["window"], data["totals"]
+    
+    summary = Table(title="📊 Lead generation stats")
+    summary.add_column("Metric")
+    summary.add_column(f"Last {recent['window_minutes']} min", justify="right")
+    summary.add_column("Since start", justify="right")
+    for key in ("runs", "runs_per_minute", "shed", "leads", "emails", "cost_usd", "leads_per_dollar",
+                "llm_calls_per_lead", "tokens_per_lead", "prompt_cache_hit_rate"):
+        summary.add_row(key, str(recent[key]), str(totals[key]))
+    for status in recent["statuses"]:
+        summary.add_row(f"status: {status}", str(recent["statuses"][status]), str(totals["statuses"][status]))
+    console.print(summary)
+    
+    admission = data.get("admission")
+    if admission:
+        console.print(
+            f"[dim]Admission: limit {admission['limit']}, {admission['in_flight']} running, {admission['queued']} queued, "
+            f"LLM latency {admission['llm_latency_seconds']}s, error rate {admission['llm_error_rate']:.1%}[/dim]"
+        )
+    
+    latency = Table(title=f"Stage latency, last {recent['window_minutes']} min (s)")
+    for column in ("Agent", "Samples", "p50", "p90", "p99", "Parse failures"):
+        latency.add_column(column, justify="left" if column == "Agent" else "right")
+    for agent in sorted(set(recent["stage_latency"]) | set(recent["parse_failure_rate"])):
+        stage = recent["stage_latency"].get(agent, {})
+        failure_rate = recent["parse_failure_rate"].get(agent)
+        latency.add_row(
+            agent,
+            str(stage.get("samples", 0)),
+            *(str(stage.get(q)) for q in ("p50", "p90", "p99")),
+            f"{failure_rate:.1%}" if failure_rate is not None else "-"
+        )
+    console.print(latency)
+
 @app.command()
 def serve():
     """Start the web server"""
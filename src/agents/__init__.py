@@ -3,11 +3,13 @@ from .researcher import ResearcherAgent
 from .matcher import MatcherAgent
 from .logger import LeadLoggerAgent
 from .emailer import EmailerAgent
+from .planner import QueryPlannerAgent
 
 __all__ = [
     "BaseAgent",
     "ResearcherAgent", 
     "MatcherAgent",
     "LeadLoggerAgent",
-    "EmailerAgent"
+    "EmailerAgent",
+    "QueryPlannerAgent"
 ]
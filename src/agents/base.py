@@ -1,6 +1,14 @@
 import autogen
 from typing import Dict, Any
 
+# Identical at the start of every agent's system message so providers and local servers can reuse its cached prefix
+SHARED_PROMPT_PREFIX = """You are part of the lead generation team of Replicant Systems, a company that builds industrial automation solutions with AI and vision systems.
+
+Output rules for every reply:
+- Return ONLY a valid JSON array with the exact structure described below.
+- No explanatory text, no markdown, no code blocks, nothing before or after the JSON array.
+"""
+
 
 class BaseAgent:
     """Base class for all agents"""
@@ -8,6 +16,13 @@ class BaseAgent:
     def __init__(self, llm_config: Dict[str, Any]):
         self.llm_config = llm_config
     
+    def build_system_message(self, instructions: str, suffix: str = "") -> str:
+        """Shared prefix, then the agent's fixed instructions, then the few values that vary per call"""
+        system_message = f"{SHARED_PROMPT_PREFIX}\n{instructions.strip()}\n"
+        if suffix:
+            system_message += f"\n{suffix.strip()}\n"
+        return system_message
+    
     def create_user_proxy(self) -> autogen.UserProxyAgent:
         """Create user proxy agent"""
         return autogen.UserProxyAgent(
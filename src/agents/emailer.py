@@ -1,28 +1,64 @@
 import autogen
+from typing import Dict, Any
 from .base import BaseAgent
 
 
-class EmailerAgent(BaseAgent):
-    """Agent responsible for generating emails"""
-    
-    def create_agent(self) -> autogen.AssistantAgent:
-        """Create emailer agent"""
-        return autogen.AssistantAgent(
-            name="EmailAgent",
-            llm_config=self.llm_config,
-            system_message="""
+FULL_EMAIL_INSTRUCTIONS = """
 You write personalized emails for each lead using the company information and Replicant's capabilities.
 
-CRITICAL: You MUST return ONLY a valid JSON array. No explanatory text, no markdown, no code blocks.
-
-Example format:
+JSON structure:
 [
   {
     "company": "ABC Manufacturing",
     "email": "Subject: Partnership Opportunity - Industrial Automation Solutions\\n\\nDear ABC Manufacturing Team,\\n\\nI hope this email finds you well. I'm reaching out from Replicant Systems, a company specializing in AI-powered vision systems and industrial automation solutions.\\n\\nBest regards,\\nReplicant Systems Team"
   }
 ]
+"""
+
+TEMPLATE_EMAIL_INSTRUCTIONS = """
+You write reusable outreach email templates for the leads in the conversation, based on Replicant's capabilities.
+Do NOT write one email per company. Each template must work for any lead it is used for.
+The number of templates to write is given at the end of these instructions.
+
+Use these placeholders exactly, they are filled in per company later:
+- {company}: the company name
+- {match}: one sentence on how Replicant Systems can help that company
+- {products}: the company's main products/services
+
+JSON structure:
+[
+  {
+    "template_id": "vision-quality",
+    "focus": "vision inspection quality defects",
+    "subject": "Vision AI Quality Control for {company}",
+    "body": "Dear {company} Team,\\n\\n{match}\\n\\nWe would love to show how this applies to your {products} lines.\\n\\nBest regards,\\nReplicant Systems Team"
+  }
+]
 
-Remember: Return ONLY the JSON array, nothing else.
+"focus" lists keywords used to pick the best template for each lead.
 """
+
+
+class EmailerAgent(BaseAgent):
+    """Agent responsible for generating emails"""
+
+    def __init__(self, llm_config: Dict[str, Any], mode: str = "full", template_count: int = 3):
+        super().__init__(llm_config)
+        self.mode = mode
+        self.template_count = template_count
+
+    def create_agent(self) -> autogen.AssistantAgent:
+        """Create emailer agent"""
+        if self.mode == "template":
+            system_message = self.build_system_message(
+                TEMPLATE_EMAIL_INSTRUCTIONS,
+                f"Number of templates to write: {self.template_count}"
+            )
+        else:
+            system_message = self.build_system_message(FULL_EMAIL_INSTRUCTIONS)
+
+        return autogen.AssistantAgent(
+            name="EmailAgent",
+            llm_config=self.llm_config,
+            system_message=system_message
         )
@@ -1,19 +1,10 @@
 import autogen
 from .base import BaseAgent
 
-
-class LeadLoggerAgent(BaseAgent):
-    """Agent responsible for logging leads"""
-    
-    def create_agent(self) -> autogen.AssistantAgent:
-        """Create lead logger agent"""
-        return autogen.AssistantAgent(
-            name="LeadLogger",
-            llm_config=self.llm_config,
-            system_message="""
+LEAD_LOGGER_INSTRUCTIONS = """
 You combine company information with match suggestions into a final lead list.
 
-IMPORTANT: Return ONLY a valid JSON array with this exact structure:
+JSON structure:
 [
   {
     "company": "Company Name",
@@ -23,7 +14,16 @@ IMPORTANT: Return ONLY a valid JSON array with this exact structure:
     "match": "How Replicant Systems can help"
   }
 ]
-
-Do not include any text before or after the JSON array.
 """
-        )
\ No newline at end of file
+
+
+class LeadLoggerAgent(BaseAgent):
+    """Agent responsible for logging leads"""
+    
+    def create_agent(self) -> autogen.AssistantAgent:
+        """Create lead logger agent"""
+        return autogen.AssistantAgent(
+            name="LeadLogger",
+            llm_config=self.llm_config,
+            system_message=self.build_system_message(LEAD_LOGGER_INSTRUCTIONS)
+        )
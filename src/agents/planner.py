@@ -0,0 +1,27 @@
+import autogen
+from .base import BaseAgent
+
+QUERY_PLANNER_INSTRUCTIONS = """
+You split a lead research prompt into narrower, non-overlapping sub-queries so that each one can be researched independently.
+Split along sub-regions (cities, states, districts) and sub-industries (segments, product categories) that fit the prompt.
+The user message states how many sub-queries are needed.
+
+JSON structure:
+[
+  {
+    "query": "Find food packaging manufacturers in Austin, Texas that could use vision AI quality control"
+  }
+]
+"""
+
+
+class QueryPlannerAgent(BaseAgent):
+    """Agent responsible for splitting a research prompt into sub-queries"""
+    
+    def create_agent(self) -> autogen.AssistantAgent:
+        """Create query planner agent"""
+        return autogen.AssistantAgent(
+            name="QueryPlanner",
+            llm_config=self.llm_config,
+            system_message=self.build_system_message(QUERY_PLANNER_INSTRUCTIONS)
+        )
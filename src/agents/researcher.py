@@ -1,19 +1,12 @@
 import autogen
+from typing import Dict, Any, Union
 from .base import BaseAgent
 
+RESEARCHER_INSTRUCTIONS = """
+You are a business researcher. Given the user's prompt (industry, location, need), find relevant companies.
+The number of companies to find is given at the end of these instructions.
 
-class ResearcherAgent(BaseAgent):
-    """Agent responsible for researching companies"""
-    
-    def create_agent(self) -> autogen.AssistantAgent:
-        """Create researcher agent"""
-        return autogen.AssistantAgent(
-            name="Researcher",
-            llm_config=self.llm_config,
-            system_message="""
-You are a business researcher. Given the user's prompt (industry, location, need), find 3-5 relevant companies.
-
-IMPORTANT: Return ONLY a valid JSON array with this exact structure:
+JSON structure:
 [
   {
     "company": "Company Name",
@@ -22,7 +15,23 @@ IMPORTANT: Return ONLY a valid JSON array with this exact structure:
     "products": "Main products/services offered"
   }
 ]
-
-Do not include any text before or after the JSON array.
 """
-        )
\ No newline at end of file
+
+
+class ResearcherAgent(BaseAgent):
+    """Agent responsible for researching companies"""
+    
+    def __init__(self, llm_config: Dict[str, Any], company_count: Union[int, str] = "3-5"):
+        super().__init__(llm_config)
+        self.company_count = company_count
+    
+    def create_agent(self) -> autogen.AssistantAgent:
+        """Create researcher agent"""
+        return autogen.AssistantAgent(
+            name="Researcher",
+            llm_config=self.llm_config,
+            system_message=self.build_system_message(
+                RESEARCHER_INSTRUCTIONS,
+                f"Number of companies to find: {self.company_count}"
+            )
+        )
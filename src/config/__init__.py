@@ -1,3 +1,35 @@
-from .settings import get_llm_config, load_environment
+from .settings import (
+    get_llm_config,
+    load_environment,
+    get_email_mode,
+    get_research_config,
+    get_matching_config,
+    get_scoring_config,
+    get_timeout_config,
+    get_recording_config,
+    get_enrichment_config,
+    get_pricing_config,
+    get_admission_config,
+    get_simulation_config
+)
+from .capabilities import load_capability_catalog
+from .pipeline import default_pipeline_definition, pipeline_path, load_pipeline_definition
 
-__all__ = ["get_llm_config", "load_environment"]
+__all__ = [
+    "get_llm_config",
+    "load_environment",
+    "get_email_mode",
+    "get_research_config",
+    "get_matching_config",
+    "get_scoring_config",
+    "get_timeout_config",
+    "get_recording_config",
+    "get_enrichment_config",
+    "get_pricing_config",
+    "get_admission_config",
+    "get_simulation_config",
+    "load_capability_catalog",
+    "default_pipeline_definition",
+    "pipeline_path",
+    "load_pipeline_definition"
+]
@@ -0,0 +1,53 @@
+import json
+import os
+from typing import List, Dict, Any
+
+DEFAULT_CAPABILITIES = [
+    {
+        "id": "vision-inspection",
+        "name": "Vision AI quality inspection",
+        "description": "Camera-based defect detection, surface inspection, dimensional checks and quality control on production lines for manufactured parts, electronics, semiconductors, packaging and food",
+        "pitch": "Replicant Systems' vision AI can automate quality inspection of {company}'s {products}, catching defects earlier and reducing manual checks."
+    },
+    {
+        "id": "assembly-automation",
+        "name": "Assembly line automation",
+        "description": "Robotic assembly, pick and place, material handling, palletizing and automated production lines for factories, automotive suppliers, electronics and appliance manufacturers",
+        "pitch": "Replicant Systems' industrial automation can streamline {company}'s assembly and material handling for {products}, raising throughput and consistency."
+    },
+    {
+        "id": "packaging-inspection",
+        "name": "Packaging and labeling verification",
+        "description": "Label, barcode, seal, fill level and packaging verification for bottling, beverages, pharmaceuticals, consumer goods and food processing",
+        "pitch": "Replicant Systems can verify labels, seals and fill levels on {company}'s {products} packaging lines with vision AI."
+    },
+    {
+        "id": "predictive-maintenance",
+        "name": "Predictive maintenance and process monitoring",
+        "description": "Sensor and vision monitoring of machines, equipment health, downtime prediction and process analytics for heavy industry, plants, mills, energy and chemicals",
+        "pitch": "Replicant Systems' AI monitoring can predict equipment issues across {company}'s operations, reducing unplanned downtime."
+    },
+    {
+        "id": "warehouse-logistics",
+        "name": "Warehouse and logistics vision",
+        "description": "Parcel tracking, sorting, inventory counting, dimensioning and automated warehouse operations for logistics, distribution, retail and e-commerce",
+        "pitch": "Replicant Systems' vision and automation can speed up sorting and inventory tracking in {company}'s logistics operations."
+    },
+]
+
+
+def load_capability_catalog() -> List[Dict[str, Any]]:
+    """Load the capability catalog from CAPABILITY_CATALOG (JSON file) or use the default"""
+    path = os.getenv("CAPABILITY_CATALOG")
+    if not path:
+        return DEFAULT_CAPABILITIES
+
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+
+    required_fields = ["id", "name", "description", "pitch"]
+    if not isinstance(catalog, list) or not all(
+        isinstance(item, dict) and all(field in item for field in required_fields) for item in catalog
+    ):
+        raise ValueError(f"Invalid capability catalog in {path}, expected a list with {required_fields}")
+    return catalog
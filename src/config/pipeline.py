@@ -0,0 +1,92 @@
+import os
+import re
+import tomllib
+from typing import Dict, Any, Optional
+
+from .settings import (
+    get_email_mode,
+    get_research_config,
+    get_matching_config,
+    get_scoring_config,
+    get_enrichment_config
+)
+
+PIPELINE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def default_pipeline_definition(for_chat: bool = False) -> Dict[str, Any]:
+    """Pipeline equivalent to the environment settings (RESEARCH_*, ENRICH_WEBSITES, MATCH_MODE, EMAIL_*)
+
+    The group chat keeps the LeadLogger, which the chunked pipeline skips.
+    """
+    research = get_research_config()
+    matching = get_matching_config()
+    stages = {
+        "research": {
+            "agent": "ResearcherAgent",
+            "concurrency": research["concurrency"],
+            "chunk_size": research["chunk_size"],
+            "max_rounds": research["max_rounds"],
+        },
+        "enrich": {
+            "function": "enrich_websites",
+            "inputs": ["research"],
+            "enabled": get_enrichment_config()["enabled"],
+            "cache": "disk",
+        },
+    }
+
+    match_inputs = ["enrich"]
+    if matching["mode"] == "embedding":
+        stages["embedding_match"] = {
+            "function": "embedding_match",
+            "inputs": ["enrich"],
+            "embedding_model": matching["embedding_model"],
+        }
+        if matching["confidence_threshold"] is not None:
+            stages["embedding_match"]["confidence_threshold"] = matching["confidence_threshold"]
+        match_inputs = ["embedding_match"]
+    stages["match"] = {
+        "agent": "MatcherAgent",
+        "inputs": match_inputs,
+        "only_unmatched": matching["mode"] == "embedding",
+        "concurrency": research["concurrency"],
+    }
+
+    last_stage = "match"
+    if for_chat:
+        stages["log"] = {"agent": "LeadLoggerAgent", "inputs": ["match"]}
+        last_stage = "log"
+
+    stages["rank"] = {"function": "rank_leads", "inputs": [last_stage]}
+    stages["email"] = {
+        "agent": "EmailerAgent",
+        "inputs": ["rank"],
+        "mode": get_email_mode(),
+        "top_k": get_scoring_config()["top_k"],
+        "chunk_size": research["chunk_size"],
+        "concurrency": research["concurrency"],
+    }
+    return {"name": "default", "stages": stages}
+
+
+def pipeline_path(name: Optional[str] = None) -> Optional[str]:
+    """TOML file of a named pipeline in PIPELINE_DIR, or PIPELINE_FILE; None means the default pipeline"""
+    if name:
+        if not PIPELINE_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid pipeline name '{name}'")
+        path = os.path.join(os.getenv("PIPELINE_DIR", "pipelines"), f"{name}.toml")
+        if not os.path.isfile(path):
+            raise ValueError(f"Unknown pipeline '{name}', no file {path}")
+        return path
+    return os.getenv("PIPELINE_FILE") or None
+
+
+def load_pipeline_definition(path: str) -> Dict[str, Any]:
+    """Read a pipeline definition from a TOML file"""
+    with open(path, "rb") as f:
+        definition = tomllib.load(f)
+    if not isinstance(definition.get("stages"), dict) or not definition["stages"]:
+        raise ValueError(f"Invalid pipeline in {path}, expected a [stages.<name>] table per stage")
+    definition.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return definition
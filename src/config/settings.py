@@ -8,16 +8,133 @@ def load_environment():
 
 
 def get_llm_config():
-    """Get LLM configuration from environment variables"""
-    api_key = os.getenv("GROQ_API_KEY")
+    """Get LLM configuration from environment variables
+    
+    LLM_BASE_URL and LLM_MODEL point the agents at another OpenAI-compatible server, e.g. a
+    local vLLM (--enable-prefix-caching) or llama.cpp server that reuses the cached KV of
+    the shared prompt prefix.
+    """
+    base_url = os.getenv("LLM_BASE_URL")
+    api_key = os.getenv("LLM_API_KEY") or os.getenv("GROQ_API_KEY")
     if not api_key:
-        raise ValueError("Missing GROQ_API_KEY in .env file")
+        if not base_url:
+            raise ValueError("Missing GROQ_API_KEY in .env file")
+        # Local servers usually accept any key
+        api_key = "local"
     
     return {
         "config_list": [{
-            "model": "meta-llama/llama-4-scout-17b-16e-instruct",
+            "model": os.getenv("LLM_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct"),
             "api_key": api_key,
-            "base_url": "https://api.groq.com/openai/v1",
+            "base_url": base_url or "https://api.groq.com/openai/v1",
         }],
         "temperature": 0.4
-    }
\ No newline at end of file
+    }
+
+def get_email_mode() -> str:
+    """Get email generation mode ('template' or 'full') from environment variables"""
+    mode = os.getenv("EMAIL_MODE", "template").lower()
+    if mode not in ("template", "full"):
+        raise ValueError(f"Invalid EMAIL_MODE '{mode}', expected 'template' or 'full'")
+    return mode
+
+
+def get_research_config() -> dict:
+    """Get chunked research settings from environment variables"""
+    return {
+        "chunk_size": int(os.getenv("RESEARCH_CHUNK_SIZE", "10")),
+        "concurrency": int(os.getenv("RESEARCH_CONCURRENCY", "4")),
+        "max_rounds": int(os.getenv("RESEARCH_MAX_ROUNDS", "3")),
+    }
+
+
+def get_matching_config() -> dict:
+    """Get lead-to-capability matching settings from environment variables"""
+    mode = os.getenv("MATCH_MODE", "embedding").lower()
+    if mode not in ("embedding", "llm"):
+        raise ValueError(f"Invalid MATCH_MODE '{mode}', expected 'embedding' or 'llm'")
+    threshold = os.getenv("MATCH_CONFIDENCE_THRESHOLD")
+    return {
+        "mode": mode,
+        "embedding_model": os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5"),
+        # Unset means the embedding model's own default threshold
+        "confidence_threshold": float(threshold) if threshold else None,
+    }
+
+
+def get_scoring_config() -> dict:
+    """Get lead scoring settings from environment variables"""
+    top_k = os.getenv("EMAIL_TOP_K")
+    return {
+        # Unset or 0 sends every ranked lead to the EmailAgent
+        "top_k": int(top_k) if top_k else None,
+        "history_file": os.getenv("LEAD_HISTORY_FILE", "lead_history.json"),
+    }
+
+
+def get_timeout_config() -> dict:
+    """Get request deadline and per-stage timeout (seconds) from environment variables"""
+    return {
+        "request": float(os.getenv("TASK_DEADLINE_SECONDS", "600")),
+        "stage": float(os.getenv("STAGE_TIMEOUT_SECONDS", "120")),
+    }
+
+
+def get_recording_config() -> dict:
+    """Get run recording settings from environment variables"""
+    return {
+        # Empty RUN_RECORDING_DIR disables recordings
+        "directory": os.getenv("RUN_RECORDING_DIR", "runs"),
+    }
+
+
+def get_enrichment_config() -> dict:
+    """Get website enrichment settings from environment variables"""
+    return {
+        "enabled": os.getenv("ENRICH_WEBSITES", "false").lower() == "true",
+        "concurrency": int(os.getenv("ENRICH_CONCURRENCY", "64")),
+        "per_host": int(os.getenv("ENRICH_PER_HOST", "2")),
+        "timeout": float(os.getenv("ENRICH_TIMEOUT_SECONDS", "10")),
+        "max_bytes": int(os.getenv("ENRICH_MAX_BYTES", "262144")),
+        "cache_dir": os.getenv("ENRICH_CACHE_DIR", ".http_cache"),
+        # Cached pages younger than this are used without revalidating
+        "cache_ttl": float(os.getenv("ENRICH_CACHE_TTL_SECONDS", "86400")),
+    }
+
+
+def get_pricing_config() -> dict:
+    """Get LLM token prices (USD per million tokens) used for cost statistics"""
+    return {
+        "input": float(os.getenv("LLM_INPUT_PRICE_PER_MTOK", "0.11")),
+        "output": float(os.getenv("LLM_OUTPUT_PRICE_PER_MTOK", "0.34")),
+    }
+
+
+def get_admission_config() -> dict:
+    """Get the API's adaptive concurrency and load shedding settings from environment variables"""
+    return {
+        "initial": int(os.getenv("ADMISSION_INITIAL_CONCURRENCY", "4")),
+        "min_limit": int(os.getenv("ADMISSION_MIN_CONCURRENCY", "1")),
+        "max_limit": int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32")),
+        # Average LLM call latency above which concurrent runs are cut back
+        "target_latency": float(os.getenv("ADMISSION_TARGET_LATENCY_SECONDS", "10")),
+        "max_error_rate": float(os.getenv("ADMISSION_MAX_ERROR_RATE", "0.2")),
+        "max_queue": int(os.getenv("ADMISSION_MAX_QUEUE", "1000")),
+    }
+
+
+def get_simulation_config() -> dict:
+    """Get the simulated LLM backend settings (LLM_BACKEND=simulation) from environment variables"""
+    seed = os.getenv("SIMULATION_SEED")
+    return {
+        "enabled": os.getenv("LLM_BACKEND", "provider").lower() == "simulation",
+        # Log-normal latency: median seconds per call and spread (sigma of the underlying normal)
+        "latency_median": float(os.getenv("SIMULATION_LATENCY_MEDIAN_SECONDS", "0.05")),
+        "latency_sigma": float(os.getenv("SIMULATION_LATENCY_SIGMA", "0.5")),
+        # Share of replies that are malformed, and of calls that fail like a provider error
+        "noise": float(os.getenv("SIMULATION_NOISE", "0.05")),
+        "error_rate": float(os.getenv("SIMULATION_ERROR_RATE", "0")),
+        # Words of filler text per description (emails get three times as many)
+        "text_words": int(os.getenv("SIMULATION_TEXT_WORDS", "20")),
+        "seed": int(seed) if seed else None,
+    }
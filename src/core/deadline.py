@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a run or one of its stages runs out of time"""
+
+
+class RunCancelled(Exception):
+    """Raised when a run is cancelled from outside, e.g. by DELETE /tasks/{id}"""
+
+
+class Deadline:
+    """Request deadline plus per-stage timeout, shared by every stage of a run
+
+    Cancellation is cooperative: stages call check() between units of work, and blocking
+    LLM calls go through call_with_deadline() so the caller stops waiting as soon as the
+    run is cancelled or out of time.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, stage_timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.stage_timeout = stage_timeout
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None when there is no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cancel(self):
+        """Ask every stage of the run to stop"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def stopped(self) -> bool:
+        """True once the run should not start any more work"""
+        return self.cancelled or self.expired
+
+    def check(self, stage: str = "run"):
+        """Raise if the run was cancelled or the deadline has passed"""
+        if self.cancelled:
+            raise RunCancelled(f"{stage} cancelled")
+        if self.expired:
+            raise DeadlineExceeded(f"{stage} exceeded the request deadline")
+
+    def stage_budget(self) -> Optional[float]:
+        """Time a single stage may take: the stage timeout capped by the time remaining"""
+        budgets = [budget for budget in (self.stage_timeout, self.remaining()) if budget is not None]
+        return min(budgets) if budgets else None
+
+
+def abandoned() -> bool:
+    """True inside a call_with_deadline thread whose caller has stopped waiting for it"""
+    return getattr(threading.current_thread(), "abandoned", False)
+
+
+def call_with_deadline(fn: Callable[[], T], deadline: Optional[Deadline], stage: str = "stage",
+                       budget: Optional[float] = None, abort: Optional[Callable[[], None]] = None) -> T:
+    """Run fn in a daemon thread, returning its result or raising once the budget is spent or the run is cancelled
+
+    The caller's worker is freed immediately instead of waiting for a hung provider call. The
+    abandoned thread is marked (see abandoned()) so its late result is not recorded, and when
+    the whole run stopped, `abort` is called to shut down the LLM clients it is still using.
+    """
+    if deadline is None:
+        return fn()
+
+    deadline.check(stage)
+    if budget is None:
+        budget = deadline.stage_budget()
+
+    result = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            result["value"] = fn()
+        except BaseException as e:
+            result["error"] = e
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=target, name=f"deadline-{stage}", daemon=True)
+    thread.start()
+
+    started = time.monotonic()
+    try:
+        while not done.wait(0.1):
+            deadline.check(stage)
+            if budget is not None and time.monotonic() - started >= budget:
+                raise DeadlineExceeded(f"{stage} timed out after {budget:.0f}s")
+    except (DeadlineExceeded, RunCancelled):
+        thread.abandoned = True
+        if abort is not None and deadline.stopped:
+            abort()
+        raise
+
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
@@ -0,0 +1,370 @@
+import asyncio
+import codecs
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import threading
+import time
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from rich.console import Console
+
+from ..utils.dedupe import normalize_domain
+from ..utils.records import LeadRecord
+from .deadline import Deadline
+
+USER_AGENT = "ReplicantLeadGen/0.1 (+https://replicant.systems)"
+SCHEME_PATTERN = re.compile(r'^https?://', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Redirects followed per URL; each hop is checked like the original URL
+MAX_REDIRECTS = 5
+
+
+class UnsafeURLError(ValueError):
+    """Raised for URLs whose host is not a public internet address"""
+
+
+# Errors that only mean this URL could not be fetched
+FETCH_ERRORS = (httpx.HTTPError, httpx.InvalidURL, ValueError)
+# HTML is parsed in slices this size so parsing stops soon after enough text is found
+FEED_SIZE = 4096
+# How often a running enrichment checks whether its run was cancelled
+CANCEL_POLL_SECONDS = 0.1
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "svg", "template", "iframe", "head"})
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental HTML-to-text extraction that stops collecting once enough text is found"""
+
+    def __init__(self, text_limit: int = 1000):
+        super().__init__(convert_charrefs=True)
+        self.text_limit = text_limit
+        self.title = ""
+        self.meta_description = ""
+        self._parts: List[str] = []
+        self._length = 0
+        self._skip_depth = 0
+        self._in_title = False
+
+    @property
+    def enough(self) -> bool:
+        return self._length >= self.text_limit
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if (attrs.get("name") or attrs.get("property") or "").lower() in ("description", "og:description"):
+                self.meta_description = self.meta_description or (attrs.get("content") or "").strip()
+        elif tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth or self.enough:
+            return
+        data = WHITESPACE_PATTERN.sub(" ", data).strip()
+        if data:
+            self._parts.append(data)
+            self._length += len(data) + 1
+
+    def text(self) -> str:
+        """Title, meta description and leading body text, capped at text_limit characters"""
+        parts = [WHITESPACE_PATTERN.sub(" ", self.title).strip(), self.meta_description, " ".join(self._parts)]
+        return " | ".join(part for part in parts if part)[:self.text_limit]
+
+
+class HTTPCache:
+    """On-disk cache of fetched pages keyed by URL, storing validators for revalidation"""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: Dict[str, Any]):
+        if not self.directory:
+            return
+        path = self._path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class WebsiteEnricher:
+    """Fetches company homepages concurrently and attaches their text to leads
+
+    Hosts get at most `per_host` connections and their robots.txt (including Crawl-delay)
+    is honoured. Pages are read as a stream and parsed incrementally, so at most `max_bytes`
+    are downloaded per page. Extracted text is cached on disk and revalidated with
+    ETag/Last-Modified once older than `cache_ttl`. URLs come from LLM output, so every
+    host, including each redirect target, must resolve to public addresses only: loopback,
+    private, link-local (e.g. cloud metadata) and reserved addresses are refused unless
+    `allow_private_hosts` is set, e.g. for a local fixture server. An instance runs one
+    enrichment at a time; concurrent callers should each create their own.
+    """
+
+    def __init__(self, concurrency: int = 64, per_host: int = 2, timeout: float = 10.0,
+                 max_bytes: int = 262144, cache_dir: Optional[str] = ".http_cache", cache_ttl: float = 86400,
+                 text_limit: int = 1000, user_agent: str = USER_AGENT, console: Optional[Console] = None,
+                 allow_private_hosts: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache = HTTPCache(cache_dir)
+        self.cache_ttl = cache_ttl
+        self.text_limit = text_limit
+        self.user_agent = user_agent
+        self.console = console or Console()
+        self.allow_private_hosts = allow_private_hosts
+        self._host_checks: Dict[str, asyncio.Task] = {}
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_next_request: Dict[str, float] = {}
+        self._robots: Dict[str, asyncio.Task] = {}
+
+    def candidate_urls(self, lead: LeadRecord) -> List[str]:
+        """Homepage URLs to try for a lead's own website
+
+        Leads without a website are skipped: a guessed domain may belong to another company,
+        and its text would then be matched and exported as this lead's.
+        """
+        website = lead.website.strip()
+        if SCHEME_PATTERN.match(website):
+            return [website]
+        if normalize_domain(website):
+            return [f"https://{website}", f"http://{website}"]
+        return []
+
+    async def _polite(self, host: str, delay: float):
+        """Space out requests to a host by its Crawl-delay"""
+        if not delay:
+            return
+        now = time.monotonic()
+        start = max(now, self._host_next_request.get(host, now))
+        self._host_next_request[host] = start + delay
+        await asyncio.sleep(start - now)
+
+    async def _resolve_public(self, host: str, port: int):
+        """Raise UnsafeURLError unless every address of the host is a public one"""
+        try:
+            addresses = [ipaddress.ip_address(host)]
+        except ValueError:
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            except OSError as e:
+                raise UnsafeURLError(f"Cannot resolve {host}: {e}")
+            addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+        for address in addresses:
+            if address.version == 6 and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                raise UnsafeURLError(f"Refusing to fetch {host}: {address} is not a public address")
+
+    async def _check_url(self, url: str):
+        """Raise UnsafeURLError for non-HTTP URLs and hosts that are not public"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise UnsafeURLError(f"Refusing to fetch {url}")
+        if self.allow_private_hosts:
+            return
+        key = f"{parts.hostname}:{parts.port}"
+        if key not in self._host_checks:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            self._host_checks[key] = asyncio.ensure_future(self._resolve_public(parts.hostname, port))
+        await self._host_checks[key]
+
+    async def _get(self, client: httpx.AsyncClient, url: str, extract: bool = True, delay: float = 0.0) -> Dict[str, Any]:
+        """GET a URL through the cache, returning {status, url, text, etag, last_modified, fetched_at}"""
+        cached = self.cache.get(url)
+        if cached and time.time() - cached["fetched_at"] < self.cache_ttl:
+            return cached
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlsplit(url).netloc.lower()
+        slot = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with slot:
+            await self._polite(host, delay)
+            target = url
+            for _ in range(MAX_REDIRECTS + 1):
+                # Redirects are followed by hand so that every hop gets the host check
+                await self._check_url(target)
+                async with client.stream("GET", target, headers=headers) as response:
+                    location = response.headers.get("location")
+                    if response.is_redirect and location:
+                        target = urljoin(str(response.url), location)
+                        headers = {}
+                        continue
+                    if response.status_code == 304 and cached:
+                        cached["fetched_at"] = time.time()
+                        self.cache.put(url, cached)
+                        return cached
+
+                    text = ""
+                    content_type = response.headers.get("content-type", "")
+                    if response.status_code < 400 and (not extract or "html" in content_type or not content_type):
+                        text = await self._read_text(response, extract)
+                    break
+            else:
+                raise UnsafeURLError(f"Too many redirects for {url}")
+
+        entry = {
+            "status": response.status_code,
+            "url": str(response.url),
+            "text": text,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+        }
+        self.cache.put(url, entry)
+        return entry
+
+    async def _read_text(self, response: httpx.Response, extract: bool) -> str:
+        """Stream at most max_bytes of the body, extracting text from HTML as it arrives"""
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        extractor = HTMLTextExtractor(self.text_limit) if extract else None
+        chunks: List[str] = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:self.max_bytes - received]
+            received += len(chunk)
+            data = decoder.decode(chunk)
+            if extractor:
+                for start in range(0, len(data), FEED_SIZE):
+                    extractor.feed(data[start:start + FEED_SIZE])
+                    if extractor.enough:
+                        break
+                if extractor.enough:
+                    break
+            else:
+                chunks.append(data)
+            if received >= self.max_bytes:
+                break
+        if extractor:
+            extractor.close()
+            return extractor.text()
+        return "".join(chunks)
+
+    async def _load_robots(self, client: httpx.AsyncClient, origin: str) -> Optional[RobotFileParser]:
+        """Fetch and parse an origin's robots.txt; None allows everything"""
+        try:
+            entry = await self._get(client, f"{origin}/robots.txt", extract=False)
+        except FETCH_ERRORS:
+            return None
+        parser = RobotFileParser()
+        if entry["status"] >= 500:
+            # An unreachable robots.txt means the whole site is off limits
+            parser.disallow_all = True
+        elif entry["status"] >= 400:
+            return None
+        else:
+            parser.parse(entry["text"].splitlines())
+        return parser
+
+    async def _robots_for(self, client: httpx.AsyncClient, url: str) -> Optional[RobotFileParser]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        if origin not in self._robots:
+            self._robots[origin] = asyncio.ensure_future(self._load_robots(client, origin))
+        return await self._robots[origin]
+
+    async def _enrich_lead(self, client: httpx.AsyncClient, lead: LeadRecord) -> bool:
+        """Attach homepage text to a lead, trying each candidate URL in turn"""
+        for url in self.candidate_urls(lead):
+            try:
+                robots = await self._robots_for(client, url)
+                if robots and not robots.can_fetch(self.user_agent, url):
+                    return False
+                delay = float(robots.crawl_delay(self.user_agent) or 0) if robots else 0.0
+                entry = await self._get(client, url, delay=delay)
+            except FETCH_ERRORS:
+                continue
+
+            if entry["status"] >= 400 or not entry["text"]:
+                continue
+            lead.site_text = entry["text"]
+            return True
+        return False
+
+    async def enrich_async(self, leads: List[LeadRecord], timeout: Optional[float] = None,
+                           deadline: Optional[Deadline] = None) -> int:
+        """Enrich leads in place, returning how many got homepage text
+
+        Pending fetches are cancelled once `timeout` has passed or the run is cancelled.
+        """
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        gate = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(client, lead):
+            async with gate:
+                return await self._enrich_lead(client, lead)
+
+        stop_at = time.monotonic() + timeout if timeout is not None else None
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=False,
+                                     headers={"User-Agent": self.user_agent}) as client:
+            done, pending = set(), {asyncio.ensure_future(bounded(client, lead)) for lead in leads}
+            while pending and not (deadline and deadline.cancelled):
+                wait = CANCEL_POLL_SECONDS if deadline else None
+                if stop_at is not None:
+                    remaining = stop_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    wait = min(wait, remaining) if wait is not None else remaining
+                finished, pending = await asyncio.wait(pending, timeout=wait)
+                done |= finished
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._robots.clear()
+        self._host_checks.clear()
+        self._host_slots.clear()
+        return sum(1 for task in done if not task.exception() and task.result())
+
+    def enrich(self, leads: List[LeadRecord], deadline: Optional[Deadline] = None) -> int:
+        """Enrich leads in place from a synchronous caller, within the stage budget"""
+        if deadline:
+            deadline.check("enrichment")
+        timeout = deadline.stage_budget() if deadline else None
+        started = time.monotonic()
+        enriched = asyncio.run(self.enrich_async(leads, timeout, deadline))
+        if deadline and deadline.cancelled:
+            deadline.check("enrichment")
+        self.console.print(f"[green]✔ Enriched {enriched}/{len(leads)} leads from their websites in {time.monotonic() - started:.1f}s[/green]")
+        return enriched
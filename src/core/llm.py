@@ -0,0 +1,135 @@
+import threading
+import time
+import autogen
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .deadline import Deadline, abandoned, call_with_deadline
+
+
+def usage_tokens(agent: autogen.ConversableAgent) -> Tuple[int, int]:
+    """(prompt_tokens, completion_tokens) reported by an agent's client so far"""
+    usage = agent.get_actual_usage() or {}
+    prompt_tokens = sum(value.get("prompt_tokens", 0) for value in usage.values() if isinstance(value, dict))
+    completion_tokens = sum(value.get("completion_tokens", 0) for value in usage.values() if isinstance(value, dict))
+    return prompt_tokens, completion_tokens
+
+
+def cached_prompt_tokens(response: Any) -> int:
+    """Prompt tokens the provider served from its prefix cache, when it reports them"""
+    details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+class LLMSession:
+    """Per-run LLM context: deadline, optional run recorder and optional offline backend
+
+    Every assistant agent of a run is installed into the session, which puts a reply function
+    in front of the agent's normal LLM reply. That single hook times and records each
+    completion, and lets an offline backend (e.g. a recording being replayed) answer instead
+    of the provider, for both group chats and direct completions. An optional observer is
+    told the duration and outcome of every call, e.g. to adapt how many runs execute at once.
+    """
+
+    def __init__(self, deadline: Optional[Deadline] = None, recorder=None, backend=None,
+                 observer: Optional[Callable[[float, bool], None]] = None):
+        self.deadline = deadline or Deadline()
+        self.recorder = recorder
+        self.backend = backend
+        self.observer = observer
+        self.agents: List[autogen.ConversableAgent] = []
+        self._local = threading.local()
+
+    def install(self, agent: autogen.ConversableAgent) -> autogen.ConversableAgent:
+        """Route an agent's LLM replies through this session"""
+        agent.register_reply([autogen.Agent, None], self._reply, position=0)
+        self._count_cached_tokens(agent)
+        self.agents.append(agent)
+        return agent
+
+    def abort(self):
+        """Close the provider clients of every installed agent once the run has stopped
+
+        Requests not yet sent, including client retries, fail immediately; one already waiting
+        for the provider ends when it answers or hits the client timeout, and is not recorded.
+        """
+        for agent in self.agents:
+            for client in getattr(agent.client, "_clients", None) or []:
+                close = getattr(getattr(client, "_oai_client", None), "close", None)
+                if close is not None:
+                    close()
+
+    def record_parse(self, agent: str, ok: bool):
+        """Count whether an agent's reply parsed into the expected structure"""
+        if self.recorder is not None:
+            self.recorder.record_parse(agent, ok)
+
+    def _count_cached_tokens(self, agent: autogen.ConversableAgent):
+        """Wrap the agent's client so that cached prompt tokens of each response are counted"""
+        client = agent.client
+        if client is None or getattr(client, "_counts_cached_tokens", False):
+            return
+        create = client.create
+
+        def create_counting(*args, **kwargs):
+            response = create(*args, **kwargs)
+            self._local.cached_tokens = getattr(self._local, "cached_tokens", 0) + cached_prompt_tokens(response)
+            return response
+
+        client.create = create_counting
+        client._counts_cached_tokens = True
+
+    def _reply(self, recipient: autogen.ConversableAgent, messages: Optional[List[Dict[str, Any]]] = None,
+               sender: Optional[autogen.Agent] = None, config: Any = None):
+        """Reply function answering from the backend or the provider, recording the call"""
+        started = time.monotonic()
+        try:
+            if self.backend is not None:
+                reply = self.backend.generate(recipient.name, messages or [], recipient.system_message)
+                prompt_tokens, completion_tokens, cached_tokens = 0, 0, 0
+            else:
+                self._local.cached_tokens = 0
+                before = usage_tokens(recipient)
+                final, reply = recipient.generate_oai_reply(messages, sender, config)
+                if not final:
+                    return False, None
+                after = usage_tokens(recipient)
+                prompt_tokens, completion_tokens = after[0] - before[0], after[1] - before[1]
+                cached_tokens = self._local.cached_tokens
+        except Exception:
+            if self.observer is not None and not abandoned():
+                self.observer(time.monotonic() - started, False)
+            raise
+
+        duration = time.monotonic() - started
+        if abandoned():
+            # The run stopped waiting for this call; its result is never used
+            return True, reply
+        if self.observer is not None:
+            self.observer(duration, True)
+        if self.recorder is not None:
+            content = reply.get("content") if isinstance(reply, dict) else reply
+            self.recorder.record_completion(
+                agent=recipient.name,
+                input=(messages[-1].get("content") if messages else "") or "",
+                output=content or "",
+                duration=duration,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+            )
+        return True, reply
+
+
+def complete(agent: autogen.ConversableAgent, content: str, session: Optional[LLMSession] = None) -> str:
+    """Run a single stateless completion against an agent and return the reply text"""
+    if session is not None:
+        session.install(agent)
+    reply = call_with_deadline(
+        lambda: agent.generate_reply(messages=[{"role": "user", "content": content}]),
+        session.deadline if session else None,
+        stage=agent.name,
+        abort=session.abort if session else None
+    )
+    if isinstance(reply, dict):
+        reply = reply.get("content")
+    return (reply or "").strip()
@@ -0,0 +1,155 @@
+import re
+import sys
+import threading
+import zlib
+import numpy as np
+from typing import Dict, Any, List, Tuple, Optional
+from rich.console import Console
+
+from ..utils.email_templates import fill_slots
+from ..utils.records import LeadRecord
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or our the their to with we you your".split()
+)
+
+# Embedders by model name and capability vectors by (embedder, catalog texts), shared by every
+# orchestrator in the process so API tasks and replays do not reload the model or re-embed the catalog
+_embedders: Dict[str, Any] = {}
+_capability_vectors: Dict[Tuple[Any, Tuple[str, ...]], np.ndarray] = {}
+_cache_lock = threading.Lock()
+
+
+def stem(token: str) -> str:
+    """Crude suffix stripping so that e.g. 'bottles'/'bottling' share features"""
+    for suffix in ("ing", "ers", "ed", "es", "er", "s"):
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, drop stop words and stem"""
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class HashingEmbedder:
+    """Dependency-free CPU embedder using hashed stemmed words and character trigrams"""
+
+    default_threshold = 0.12
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        tokens = tokenize(text)
+        features = [(token, 1.0) for token in tokens]
+        for token in tokens:
+            padded = f"<{token}>"
+            features.extend((padded[i:i + 3], 0.3) for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix"""
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(h % self.dim)
+                values.append(weight if h & 0x80000000 else -weight)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(values, dtype=np.float32))
+        return matrix
+
+
+class FastEmbedEmbedder:
+    """Local ONNX sentence embedder backed by fastembed"""
+
+    default_threshold = 0.6
+
+    def __init__(self, model_name: str):
+        from fastembed import TextEmbedding
+        self.model = TextEmbedding(model_name=model_name)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix"""
+        return np.vstack(list(self.model.embed(texts, batch_size=256))).astype(np.float32)
+
+
+def get_embedder(model_name: str, console: Optional[Console] = None):
+    """Get the local embedding model, loaded once per process, falling back to hashing when fastembed is not installed"""
+    with _cache_lock:
+        if model_name not in _embedders:
+            try:
+                _embedders[model_name] = FastEmbedEmbedder(model_name)
+            except ImportError:
+                (console or Console()).print("[yellow]⚠ fastembed not installed, using hashing embedder for matching[/yellow]")
+                _embedders[model_name] = HashingEmbedder()
+        return _embedders[model_name]
+
+
+def capability_vectors(embedder, texts: Tuple[str, ...]) -> np.ndarray:
+    """Normalized embeddings of capability texts, computed once per embedder and catalog contents"""
+    key = (embedder, texts)
+    with _cache_lock:
+        vectors = _capability_vectors.get(key)
+    if vectors is None:
+        vectors = _normalize_rows(embedder.embed(list(texts)))
+        with _cache_lock:
+            _capability_vectors[key] = vectors
+    return vectors
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def lead_text(lead: LeadRecord) -> str:
+    """Text used to embed a lead"""
+    return f"{lead.description}. {lead.products}. {lead.site_text}" if lead.site_text else f"{lead.description}. {lead.products}"
+
+
+class CapabilityMatcher:
+    """Matches leads to a capability catalog by cosine similarity of local embeddings"""
+
+    def __init__(self, catalog: List[Dict[str, Any]], embedder, confidence_threshold: Optional[float] = None):
+        self.catalog = catalog
+        self.embedder = embedder
+        if confidence_threshold is None:
+            confidence_threshold = embedder.default_threshold
+        self.confidence_threshold = confidence_threshold
+        self.capability_vectors = capability_vectors(
+            embedder, tuple(f"{item['name']}. {item['description']}" for item in catalog)
+        )
+
+    def score(self, leads: List[LeadRecord]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return best capability index and cosine similarity per lead"""
+        if not leads:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        lead_vectors = _normalize_rows(self.embedder.embed([lead_text(lead) for lead in leads]))
+        similarities = lead_vectors @ self.capability_vectors.T
+        best = similarities.argmax(axis=1)
+        return best, similarities[np.arange(len(leads)), best]
+
+    def match(self, leads: List[LeadRecord]) -> Tuple[List[LeadRecord], List[LeadRecord]]:
+        """Fill in matches in place for confident leads, returning (matched, low_confidence)"""
+        best, scores = self.score(leads)
+        matched, low_confidence = [], []
+        for lead, index, score in zip(leads, best.tolist(), scores.tolist()):
+            capability = self.catalog[index]
+            lead.capability = sys.intern(capability["id"])
+            lead.match_score = round(score, 4)
+            if score < self.confidence_threshold:
+                low_confidence.append(lead)
+                continue
+            lead.match = fill_slots(capability["pitch"], {
+                "company": lead.company,
+                "products": lead.products or "products",
+                "match": ""
+            })
+            matched.append(lead)
+        return matched, low_confidence
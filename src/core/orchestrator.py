@@ -1,54 +1,216 @@
+import copy
+import functools
+import json
+import math
+import os
 import autogen
-from typing import Tuple, Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple, Optional, Iterator, List, Dict, Any
 from rich.console import Console
 from rich.panel import Panel
 
-from ..config import get_llm_config
-from ..agents import ResearcherAgent, MatcherAgent, LeadLoggerAgent, EmailerAgent, BaseAgent
+from ..config import (
+    get_llm_config,
+    get_email_mode,
+    get_matching_config,
+    get_scoring_config,
+    get_timeout_config,
+    get_recording_config,
+    get_enrichment_config,
+    get_simulation_config,
+    load_capability_catalog
+)
+from ..agents import BaseAgent
 from ..utils import (
     extract_json_from_text, 
     validate_leads_structure, 
     validate_emails_structure,
+    validate_templates_structure,
     save_leads_to_excel,
-    save_emails_to_json
+    save_emails_to_json,
+    save_templates_to_json,
+    load_lead_history,
+    update_lead_history,
+    render_emails,
+    LeadRecord,
+    EmailRecord
+)
+from ..utils.dedupe import normalize_company_name
+from .llm import LLMSession, complete
+from .deadline import Deadline, DeadlineExceeded, RunCancelled, call_with_deadline
+from .research import ChunkedResearcher
+from .matching import CapabilityMatcher, get_embedder
+from .scoring import rank_leads
+from .recording import RunRecorder, ReplayBackend, load_recording
+from .simulation import SimulationBackend
+from .enrichment import WebsiteEnricher
+from .pipeline import Stage, PipelineRunner, get_pipeline
+
+# Settings that change what a run does, stored in recordings and restored on replay
+RECORDED_SETTINGS = (
+    "EMAIL_MODE",
+    "MATCH_MODE",
+    "EMBEDDING_MODEL",
+    "MATCH_CONFIDENCE_THRESHOLD",
+    "CAPABILITY_CATALOG",
+    "EMAIL_TOP_K",
+    "RESEARCH_CHUNK_SIZE",
+    "RESEARCH_CONCURRENCY",
+    "RESEARCH_MAX_ROUNDS",
+    "PIPELINE_FILE",
 )
+# autogen cache seed used by stages with cache = "disk"
+DISK_CACHE_SEED = 41
+
+
+def _set_environ(values: Dict[str, Optional[str]]):
+    """Set environment variables, removing those whose value is None"""
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
 
 
 class LeadGenOrchestrator:
     """Main orchestrator for the lead generation process"""
     
-    def __init__(self):
+    def __init__(self, backend=None, observer=None):
         self.console = Console()
         self.llm_config = None
+        self.email_mode = "full"
+        self.scoring_config = None
         self.agents = {}
+        self.templates = None
+        self.capability_matcher = None
+        self.enrichment_config = None
+        # Homepage text fetched this run by company, so leads enriched once are not fetched again
+        self.site_text: Dict[str, str] = {}
+        self.pipeline = None
+        self.pipeline_name = None
+        self.prompt = None
+        self.target_count = None
+        self.deadline = Deadline()
+        self.stopped_reason = None
+        # Offline LLM backend (a ReplayBackend, or a SimulationBackend with LLM_BACKEND=simulation);
+        # None talks to the provider
+        if backend is None and get_simulation_config()["enabled"]:
+            backend = SimulationBackend.from_config()
+        self.backend = backend
+        # Called with (duration, ok) after every LLM call, e.g. by the API's concurrency limiter
+        self.observer = observer
+        self.session = LLMSession(self.deadline, backend=backend, observer=observer)
+        self.recorder = None
+        self.recording_dir = get_recording_config()["directory"]
+        # Write lead_tracker.xlsx, emails.json and email_templates.json; the API keeps results per task instead
+        self.save_outputs = True
+        # Add exported companies to LEAD_HISTORY_FILE, which ranking uses for novelty
+        self.update_history = True
+        # Already exported companies as recorded by the run being replayed; None reads the history file
+        self.replay_history = None
+        # Homepage text by company as recorded by the run being replayed; enrich stages restore it
+        # instead of fetching, whatever the pipeline says. None fetches websites.
+        self.replay_site_text = None
     
-    def _setup_agents(self):
-        """Setup all agents"""
+    def _load_config(self, for_chat: bool = False):
+        """Load LLM and pipeline configuration"""
         try:
-            self.llm_config = get_llm_config()
+            self.llm_config = self.backend.llm_config() if self.backend else get_llm_config()
+            self.scoring_config = get_scoring_config()
+            self.enrichment_config = get_enrichment_config()
+            self.pipeline = get_pipeline(self.pipeline_name, for_chat=for_chat)
         except ValueError as e:
             self.console.print(f"[red]Configuration Error: {e}[/red]")
             raise
         
-        # Create agent instances
-        base_agent = BaseAgent(self.llm_config)
-        researcher = ResearcherAgent(self.llm_config)
-        matcher = MatcherAgent(self.llm_config)
-        logger = LeadLoggerAgent(self.llm_config)
-        emailer = EmailerAgent(self.llm_config)
-        
-        # Create actual agents
-        self.agents = {
-            'user': base_agent.create_user_proxy(),
-            'researcher': researcher.create_agent(),
-            'matcher': matcher.create_agent(),
-            'logger': logger.create_agent(),
-            'emailer': emailer.create_agent()
-        }
+        email_stage = self.pipeline.find("email")
+        self.email_mode = email_stage.options.get("mode", get_email_mode()) if email_stage else get_email_mode()
+        
+        # Bound every provider request so an abandoned call cannot hang forever
+        if self.deadline.stage_timeout:
+            self.llm_config["timeout"] = math.ceil(self.deadline.stage_timeout)
+    
+    def _stage_llm_config(self, stage: Stage) -> Dict[str, Any]:
+        """LLM config for a stage, applying its model override and cache policy"""
+        llm_config = copy.deepcopy(self.llm_config)
+        if stage.model:
+            for entry in llm_config["config_list"]:
+                entry["model"] = stage.model
+        if stage.cache == "disk":
+            llm_config["cache_seed"] = DISK_CACHE_SEED
+        return llm_config
+    
+    def _setup_matcher(self):
+        """Build the embedding matcher when the pipeline has an embedding_match stage"""
+        stage = self.pipeline.find("embedding_match")
+        if stage is None:
+            self.capability_matcher = None
+            return
+        
+        if self.capability_matcher is None:
+            matching_config = get_matching_config()
+            self.capability_matcher = CapabilityMatcher(
+                load_capability_catalog(),
+                get_embedder(stage.options.get("embedding_model", matching_config["embedding_model"]), console=self.console),
+                confidence_threshold=stage.options.get("confidence_threshold", matching_config["confidence_threshold"])
+            )
+    
+    def _enrich(self, leads: List[LeadRecord], stage: Stage):
+        """Attach homepage text to leads, keeping them as they are on failure"""
+        known = self.site_text if self.replay_site_text is None else self.replay_site_text
+        pending = []
+        for lead in leads:
+            lead.site_text = lead.site_text or known.get(normalize_company_name(lead.company), "")
+            if not lead.site_text:
+                pending.append(lead)
+        if not pending or self.replay_site_text is not None:
+            return
+        config = {key: value for key, value in self.enrichment_config.items() if key != "enabled"}
+        config.update({key: value for key, value in stage.options.items() if key in config})
+        if stage.cache == "none":
+            config["cache_dir"] = None
+        try:
+            WebsiteEnricher(console=self.console, **config).enrich(pending, self.deadline)
+        except (DeadlineExceeded, RunCancelled):
+            raise
+        except Exception as e:
+            self.console.print(f"[yellow]⚠ Website enrichment failed: {e}[/yellow]")
+        fetched = {normalize_company_name(lead.company): lead.site_text for lead in pending if lead.site_text}
+        self.site_text.update(fetched)
+        if self.recorder:
+            self.recorder.record_site_text(fetched)
+    
+    def _enrich_research_message(self, stage: Stage, sender: autogen.Agent, message: Any,
+                                 recipient: autogen.Agent, silent: bool) -> Any:
+        """Hook on the Researcher's messages that enriches its companies before the Matcher sees them"""
+        content = message.get("content") if isinstance(message, dict) else message
+        leads = extract_json_from_text(content or "")
+        if not leads or not validate_leads_structure(leads):
+            return message
+        
+        records = [LeadRecord.from_dict(lead) for lead in leads]
+        self._enrich(records, stage)
+        content = json.dumps([record.to_prompt_dict() for record in records], ensure_ascii=False)
+        return dict(message, content=content) if isinstance(message, dict) else content
+    
+    def _setup_agents(self):
+        """Setup the group chat agents from the pipeline's agent stages"""
+        self._load_config(for_chat=True)
+        
+        self.agents = {'user': BaseAgent(self.llm_config).create_user_proxy()}
+        for stage in self.pipeline.agent_stages():
+            self.agents[stage.name] = self.session.install(stage.create_agent(self._stage_llm_config(stage)))
+        
+        enrich_stage = self.pipeline.find("enrich")
+        if enrich_stage:
+            self.agents[self.pipeline.source.name].register_hook(
+                "process_message_before_send", functools.partial(self._enrich_research_message, enrich_stage)
+            )
     
-    def _process_messages(self, messages: List[Dict[str, Any]]) -> Tuple[Optional[List], Optional[List]]:
+    def _process_messages(self, messages: List[Dict[str, Any]]) -> Tuple[Optional[List[LeadRecord]], Optional[List[EmailRecord]]]:
         """Process messages to extract leads and emails"""
         leads, emails = None, None
+        self.templates = None
         
         self.console.print("\n[blue]Processing agent outputs...[/blue]")
         
@@ -59,42 +221,351 @@ class LeadGenOrchestrator:
                     self.console.print(f"[dim]LeadLogger content preview: {content[:100]}...[/dim]")
                     leads = extract_json_from_text(content)
                     
-                    if leads and validate_leads_structure(leads):
+                    valid = bool(leads) and validate_leads_structure(leads)
+                    self.session.record_parse("LeadLogger", valid)
+                    if valid:
+                        leads = [LeadRecord.from_dict(lead) for lead in leads]
                         self.console.print(f"[green]✔ Got {len(leads)} structured leads from LeadLogger[/green]")
                     else:
                         self.console.print(f"[yellow]⚠ Invalid lead structure from LeadLogger[/yellow]")
                         leads = None
                 except Exception as e:
+                    self.session.record_parse("LeadLogger", False)
                     self.console.print(f"[red]Lead parsing failed: {e}[/red]")
             
-            if msg.get("name") == "EmailAgent" and emails is None:
+            # Stop at the newest valid reply, whether it held templates or emails
+            if msg.get("name") == "EmailAgent" and emails is None and self.templates is None:
                 try:
                     content = msg["content"].strip()
                     self.console.print(f"[dim]EmailAgent content preview: {content[:100]}...[/dim]")
                     emails = extract_json_from_text(content)
                     
-                    if emails and validate_emails_structure(emails):
+                    if self.email_mode == "template" and emails and validate_templates_structure(emails):
+                        self.session.record_parse("EmailAgent", True)
+                        self.templates = emails
+                        emails = None
+                        self.console.print(f"[green]✔ Got {len(self.templates)} email templates from EmailAgent[/green]")
+                    elif emails and validate_emails_structure(emails):
+                        self.session.record_parse("EmailAgent", True)
+                        emails = [EmailRecord.from_dict(email) for email in emails]
                         self.console.print(f"[green]✔ Got {len(emails)} emails from EmailAgent[/green]")
                     else:
+                        self.session.record_parse("EmailAgent", False)
                         self.console.print(f"[yellow]⚠ Invalid email structure from EmailAgent[/yellow]")
                         self.console.print(f"[dim]Raw content: {content[:200]}...[/dim]")
                         emails = None
                 except Exception as e:
+                    self.session.record_parse("EmailAgent", False)
                     self.console.print(f"[red]Email parsing failed: {e}[/red]")
         
+        # Pipelines without a LeadLogger, and stopped runs that never reached it, use the research
+        if leads is None and (self.stopped_reason or self.pipeline.find("log") is None):
+            leads = self._research_leads(messages)
+        
         return leads, emails
     
-    def _save_results(self, leads: Optional[List], emails: Optional[List]):
+    def _research_leads(self, messages: List[Dict[str, Any]]) -> Optional[List[LeadRecord]]:
+        """Fall back to the Researcher's validated companies, with any matches the Matcher made"""
+        for msg in reversed(messages):
+            if msg.get("name") != "Researcher":
+                continue
+            leads = extract_json_from_text((msg.get("content") or "").strip())
+            if leads and validate_leads_structure(leads):
+                records = [LeadRecord.from_dict(lead) for lead in leads]
+                self._merge_matches(records, self._chat_matches(messages))
+                self.console.print(f"[yellow]⚠ Using {len(records)} leads from the Researcher[/yellow]")
+                return records
+        return None
+    
+    @staticmethod
+    def _chat_matches(messages: List[Dict[str, Any]]) -> List[Any]:
+        """The Matcher's last reply in the group chat, if it was JSON"""
+        for msg in reversed(messages):
+            if msg.get("name") == "Matcher":
+                return extract_json_from_text((msg.get("content") or "").strip()) or []
+        return []
+    
+    @staticmethod
+    def _merge_matches(leads: List[LeadRecord], matches: List[Any]):
+        """Set each lead's match from the Matcher's [{company, match}] reply"""
+        match_by_name = {
+            normalize_company_name(str(item.get("company", ""))): str(item.get("match", ""))
+            for item in matches if isinstance(item, dict)
+        }
+        for lead in leads:
+            lead.match = match_by_name.get(normalize_company_name(lead.company)) or lead.match
+    
+    def _save_results(self, leads: Optional[List[LeadRecord]], emails: Optional[List[EmailRecord]]):
         """Save results to files"""
+        if leads and self.update_history:
+            update_lead_history(leads, self.scoring_config["history_file"])
+        
+        if not self.save_outputs:
+            return
+        
         if leads:
             save_leads_to_excel(leads)
         
         if emails:
             save_emails_to_json(emails)
+        
+        if self.templates:
+            save_templates_to_json(self.templates)
+    
+    def _rank_leads(self, prompt: str, leads: List[LeadRecord]) -> List[LeadRecord]:
+        """Score and sort leads, best first"""
+        if self.replay_history is not None:
+            history = self.replay_history
+        else:
+            history = load_lead_history(self.scoring_config["history_file"])
+        if self.recorder:
+            # Only the novelty of these leads depends on the history, so that is all a replay needs
+            self.recorder.record_history({normalize_company_name(lead.company) for lead in leads} & history)
+        ranked = rank_leads(leads, prompt, history, self.capability_matcher)
+        if ranked:
+            self.console.print(f"[green]✔ Ranked {len(ranked)} leads (top score {ranked[0].score:.2f})[/green]")
+        return ranked
+    
+    def _top_k(self, ranked: List[LeadRecord], top_k: Optional[int]) -> List[LeadRecord]:
+        """Leads that should get an email, the best `top_k` when set"""
+        if top_k and len(ranked) > top_k:
+            self.console.print(f"[dim]Emailing the top {top_k} of {len(ranked)} leads[/dim]")
+            return ranked[:top_k]
+        return ranked
+    
+    def _run_local_stages(self, leads: List[LeadRecord]) -> List[LeadRecord]:
+        """Run the pipeline's function stages on the group chat's leads, in stage order
+        
+        The chat only covers agent stages. A stage that fails keeps its input leads, as in
+        PipelineRunner; enrich stages reuse the text fetched for the Researcher's messages.
+        """
+        self._setup_matcher()
+        for stage in self.pipeline.order:
+            if stage.agent_class is not None:
+                continue
+            try:
+                leads = self._run_stage(stage, leads)
+            except (DeadlineExceeded, RunCancelled) as e:
+                self._stop(e)
+            except Exception as e:
+                self.console.print(f"[red]Stage '{stage.name}' failed: {e}[/red]")
+        return leads
     
-    def generate_leads(self, prompt: str):
-        """Main method to generate leads and emails"""
+    def _run_stage(self, stage: Stage, leads: Optional[List[LeadRecord]]) -> Any:
+        """Run one pipeline stage through its handler"""
+        return getattr(self, f"_stage_{stage.handler}")(stage, leads)
+    
+    def _stage_research(self, stage: Stage, _) -> Iterator[List[LeadRecord]]:
+        """Research in chunks, yielding lead batches as they are found"""
+        researcher = ChunkedResearcher(
+            self._stage_llm_config(stage),
+            chunk_size=stage.options.get("chunk_size", 10),
+            concurrency=stage.concurrency,
+            max_rounds=stage.options.get("max_rounds", 3),
+            console=self.console,
+            session=self.session,
+            agent_class=stage.agent_class
+        )
+        return researcher.iter_batches(self.prompt, self.target_count)
+    
+    def _stage_enrich(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        self._enrich(leads, stage)
+        return leads
+    
+    def _stage_embedding_match(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        matched, low_confidence = self.capability_matcher.match(leads)
+        if low_confidence:
+            self.console.print(f"[dim]{len(low_confidence)} leads below the match confidence threshold[/dim]")
+        return leads
+    
+    def _stage_llm_match(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        """Ask the Matcher about a batch of companies, optionally only those still without a match"""
+        pending = [lead for lead in leads if not lead.match] if stage.options.get("only_unmatched") else leads
+        if not pending:
+            return leads
+        if len(pending) < len(leads):
+            self.console.print(f"[dim]{len(pending)} low-confidence matches sent to the Matcher agent[/dim]")
+        
+        matcher = stage.create_agent(self._stage_llm_config(stage))
+        content = "Companies:\n" + json.dumps([lead.to_prompt_dict() for lead in pending], ensure_ascii=False)
+        matches = extract_json_from_text(complete(matcher, content, self.session)) or []
+        self.session.record_parse(matcher.name, bool(matches))
+        self._merge_matches(pending, matches)
+        
+        unmatched = sum(1 for lead in pending if not lead.match)
+        if unmatched:
+            self.console.print(f"[yellow]⚠ Matcher returned no match for {unmatched} companies[/yellow]")
+        return leads
+    
+    def _stage_log(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        """Have the LeadLogger clean up a batch, keeping fields it does not return"""
+        logger = stage.create_agent(self._stage_llm_config(stage))
+        content = "Leads:\n" + json.dumps([lead.to_prompt_dict() for lead in leads], ensure_ascii=False)
+        logged = extract_json_from_text(complete(logger, content, self.session))
+        valid = bool(logged) and validate_leads_structure(logged)
+        self.session.record_parse(logger.name, valid)
+        if not valid:
+            self.console.print("[yellow]⚠ Invalid lead structure from LeadLogger batch[/yellow]")
+            return leads
+        
+        by_name = {normalize_company_name(lead.company): lead for lead in leads}
+        records = []
+        for item in logged:
+            record = LeadRecord.from_dict(item)
+            original = by_name.get(normalize_company_name(record.company))
+            if original:
+                record.capability = original.capability
+                record.match_score = original.match_score
+                record.site_text = original.site_text
+            records.append(record)
+        return records
+    
+    def _stage_rank(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        self.console.print(f"[green]✔ Got {len(leads)} matched leads[/green]")
+        return self._rank_leads(self.prompt, leads)
+    
+    def _stage_email(self, stage: Stage, leads: List[LeadRecord]) -> List[EmailRecord]:
+        return self._generate_emails(self._top_k(leads, stage.options.get("top_k")), stage)
+    
+    def _stage_custom(self, stage: Stage, leads: List[LeadRecord]) -> List[LeadRecord]:
+        """Custom function stage; returning None keeps the leads it was given"""
+        result = stage.function(leads, **stage.options)
+        return leads if result is None else result
+    
+    def _email_batch(self, stage: Stage, batch: List[LeadRecord]) -> List[EmailRecord]:
+        """Generate full emails for a batch of leads"""
+        emailer = stage.create_agent(self._stage_llm_config(stage), mode="full")
+        content = "Leads:\n" + json.dumps([lead.to_prompt_dict() for lead in batch], ensure_ascii=False)
+        emails = extract_json_from_text(complete(emailer, content, self.session))
+        valid = bool(emails) and validate_emails_structure(emails)
+        self.session.record_parse(emailer.name, valid)
+        if not valid:
+            self.console.print("[yellow]⚠ Invalid email structure from EmailAgent batch[/yellow]")
+            return []
+        return [EmailRecord.from_dict(email) for email in emails]
+    
+    def _generate_emails(self, leads: List[LeadRecord], stage: Stage) -> List[EmailRecord]:
+        """Generate emails for researched leads, from templates or in concurrent batches"""
+        if not leads:
+            return []
+        
+        if stage.options.get("mode", self.email_mode) == "template":
+            emailer = stage.create_agent(self._stage_llm_config(stage), mode="template")
+            # A small sample is enough to write templates that fit the whole lead set
+            sample = [{"company": lead.company, "products": lead.products, "match": lead.match} for lead in leads[:10]]
+            content = "Leads:\n" + json.dumps(sample, ensure_ascii=False)
+            templates = extract_json_from_text(complete(emailer, content, self.session))
+            valid = bool(templates) and validate_templates_structure(templates)
+            self.session.record_parse(emailer.name, valid)
+            if valid:
+                self.templates = templates
+                self.console.print(f"[green]✔ Got {len(templates)} email templates from EmailAgent[/green]")
+                return render_emails(templates, leads)
+            self.console.print("[yellow]⚠ Invalid template structure from EmailAgent, writing full emails[/yellow]")
+        
+        emails = []
+        chunk_size = max(1, stage.options.get("chunk_size", 10))
+        batches = [leads[i:i + chunk_size] for i in range(0, len(leads), chunk_size)]
+        with ThreadPoolExecutor(max_workers=stage.concurrency) as executor:
+            for future in as_completed([executor.submit(self._email_batch, stage, batch) for batch in batches]):
+                try:
+                    emails.extend(future.result())
+                except (DeadlineExceeded, RunCancelled) as e:
+                    self._stop(e)
+                except Exception as e:
+                    self.console.print(f"[red]Email generation failed: {e}[/red]")
+        return emails
+    
+    def _stop(self, error: Exception):
+        """Record why the run stopped, keeping the first reason"""
+        self.stopped_reason = self.stopped_reason or str(error)
+    
+    def generate_leads_at_scale(self, prompt: str, target_count: int) -> Dict[str, Any]:
+        """Generate a large number of leads by streaming research batches through the pipeline"""
+        self._load_config()
+        self._setup_matcher()
+        self.templates = None
+        
+        runner = PipelineRunner(
+            self.pipeline,
+            self._run_stage,
+            on_stop=self._stop,
+            is_stopped=lambda: self.stopped_reason is not None or self.deadline.stopped,
+            console=self.console
+        )
+        self.console.print(f"[dim]Running pipeline '{self.pipeline.name}': {' → '.join(s.name for s in self.pipeline.order)}[/dim]")
+        leads, emails = runner.results(runner.run())
+        self._save_results(leads, emails)
+        
+        return self._summarize(leads, emails)
+    
+    def _summarize(self, leads: Optional[List[LeadRecord]], emails: Optional[List[EmailRecord]]) -> Dict[str, Any]:
+        """Print the run summary and build the result returned to callers"""
+        if self.stopped_reason:
+            self.console.print(f"[yellow]⚠ Run stopped early ({self.stopped_reason}), returning partial results[/yellow]")
+        elif not leads and not emails:
+            self.console.print("[yellow]⚠ No valid data was generated. Check the conversation flow.[/yellow]")
+        else:
+            self.console.print(f"[green]✔ Process completed successfully![/green]")
+        
+        metrics = self.recorder.summary() if self.recorder else None
+        if metrics and metrics["prompt_cache_hit_rate"] is not None:
+            self.console.print(
+                f"[dim]Prompt cache: {metrics['cached_prompt_tokens']}/{metrics['prompt_tokens']} prompt tokens cached "
+                f"({metrics['prompt_cache_hit_rate']:.0%})[/dim]"
+            )
+        
+        result = {
+            "leads": leads or [],
+            "emails": emails or [],
+            "templates": self.templates or [],
+            "partial": self.stopped_reason is not None,
+            "stopped_reason": self.stopped_reason,
+            "pipeline": self.pipeline.name if self.pipeline else None,
+            "metrics": metrics,
+            "recording": None
+        }
+        
+        if self.recorder and self.recording_dir:
+            try:
+                result["recording"] = self.recorder.save(self.recording_dir, result)
+                self.console.print(f"[dim]Run recorded to {result['recording']}[/dim]")
+            except OSError as e:
+                self.console.print(f"[yellow]⚠ Could not save run recording: {e}[/yellow]")
+        return result
+    
+    def _select_speaker(self, last_speaker: autogen.Agent, groupchat: autogen.GroupChat) -> Optional[autogen.Agent]:
+        """Round-robin speaker selection that ends the chat once the run is cancelled or out of time"""
+        if self.deadline.stopped:
+            return None
+        agents = groupchat.agents
+        return agents[(agents.index(last_speaker) + 1) % len(agents)]
+    
+    def generate_leads(self, prompt: str, target_count: Optional[int] = None,
+                       deadline: Optional[Deadline] = None, pipeline: Optional[str] = None) -> Dict[str, Any]:
+        """Main method to generate leads and emails
+        
+        `pipeline` names a definition in PIPELINE_DIR; None uses PIPELINE_FILE or the default pipeline.
+        """
         self.console.print(Panel(f"[bold]LeadGen Prompt:[/bold] {prompt}", title="📌 Prompt"))
+        self.prompt = prompt
+        self.target_count = target_count
+        self.pipeline_name = pipeline
+        
+        if deadline is None:
+            timeouts = get_timeout_config()
+            deadline = Deadline(timeouts["request"], timeouts["stage"])
+        self.deadline = deadline
+        self.stopped_reason = None
+        self.site_text = {}
+        config = {name: os.environ[name] for name in RECORDED_SETTINGS if name in os.environ}
+        if pipeline:
+            config["pipeline"] = pipeline
+        self.recorder = RunRecorder(prompt, target_count, config=config)
+        self.session = LLMSession(deadline, recorder=self.recorder, backend=self.backend, observer=self.observer)
+        
+        if target_count:
+            return self.generate_leads_at_scale(prompt, target_count)
         
         try:
             # Setup agents
@@ -105,8 +576,9 @@ class LeadGenOrchestrator:
             groupchat = autogen.GroupChat(
                 agents=agent_list,
                 messages=[],
-                max_round=15,
-                speaker_selection_method="round_robin"
+                # Three passes over the pipeline's agents
+                max_round=3 * len(agent_list),
+                speaker_selection_method=self._select_speaker
             )
             
             manager = autogen.GroupChatManager(
@@ -114,21 +586,66 @@ class LeadGenOrchestrator:
                 llm_config=self.llm_config
             )
             
-            # Initiate the chat
-            self.agents['user'].initiate_chat(manager, message=prompt)
+            # Initiate the chat; the whole chat is bounded by the request deadline
+            try:
+                call_with_deadline(
+                    lambda: self.agents['user'].initiate_chat(manager, message=prompt),
+                    self.deadline,
+                    stage="group chat",
+                    budget=math.inf,
+                    abort=self.session.abort
+                )
+            except (DeadlineExceeded, RunCancelled) as e:
+                self.stopped_reason = str(e)
             
             # Process results
-            leads, emails = self._process_messages(groupchat.messages)
+            self.recorder.record_messages(groupchat.messages)
+            leads, emails = self._process_messages(list(groupchat.messages))
+            
+            # Match and rank with the function stages, then keep emails for the top-K only
+            email_stage = self.pipeline.find("email")
+            if leads:
+                leads = self._run_local_stages(leads)
+            if leads and email_stage:
+                top = self._top_k(leads, email_stage.options.get("top_k"))
+                if self.templates:
+                    emails = render_emails(self.templates, top)
+                    self.console.print(f"[green]✔ Rendered {len(emails)} emails from templates[/green]")
+                elif emails:
+                    selected = {normalize_company_name(lead.company) for lead in top}
+                    emails = [email for email in emails if normalize_company_name(email.company) in selected]
             
             # Save results
             self._save_results(leads, emails)
             
-            # Summary
-            if not leads and not emails:
-                self.console.print("[yellow]⚠ No valid data was generated. Check the conversation flow.[/yellow]")
-            else:
-                self.console.print(f"[green]✔ Process completed successfully![/green]")
+            return self._summarize(leads, emails)
                 
         except Exception as e:
             self.console.print(f"[red]Unexpected error: {e}[/red]")
-            raise
\ No newline at end of file
+            raise
+    
+    @classmethod
+    def replay(cls, path: str, latency_scale: float = 0.0) -> Dict[str, Any]:
+        """Re-run a recorded run offline, answering every LLM call from the recording
+        
+        The settings the run was recorded with apply for the duration of the replay, and ranking
+        sees the lead history as the run did. Results are not written to disk and the lead
+        history is left untouched.
+        """
+        recording = load_recording(path)
+        header = recording["header"]
+        overrides = {name: header["config"].get(name) for name in RECORDED_SETTINGS}
+        saved = {name: os.environ.get(name) for name in overrides}
+        _set_environ(overrides)
+        try:
+            orchestrator = cls(backend=ReplayBackend(recording, latency_scale=latency_scale))
+            orchestrator.recording_dir = None
+            orchestrator.save_outputs = False
+            orchestrator.update_history = False
+            orchestrator.replay_history = set(recording["history"] or ())
+            # Replays never touch the network; enriched leads get the text the run fetched
+            orchestrator.replay_site_text = recording["site_text"] or {}
+            return orchestrator.generate_leads(header["prompt"], target_count=header["target_count"], deadline=Deadline(),
+                                               pipeline=header["config"].get("pipeline"))
+        finally:
+            _set_environ(saved)
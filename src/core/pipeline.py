@@ -0,0 +1,334 @@
+import importlib
+import inspect
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from rich.console import Console
+
+from .. import agents
+from ..agents import BaseAgent, ResearcherAgent, MatcherAgent, LeadLoggerAgent, EmailerAgent
+from ..config.pipeline import default_pipeline_definition, pipeline_path, load_pipeline_definition
+from ..utils import LeadRecord
+from .deadline import DeadlineExceeded, RunCancelled
+
+# Stage scopes: the source yields lead batches, batch stages run once per batch as batches
+# arrive, set stages run once on all leads after every batch is done
+SOURCE, BATCH, SET = "source", "batch", "set"
+
+# Agent classes (and their subclasses) -> (handler, scope)
+AGENT_HANDLERS = [
+    (ResearcherAgent, ("research", SOURCE)),
+    (MatcherAgent, ("llm_match", BATCH)),
+    (LeadLoggerAgent, ("log", BATCH)),
+    (EmailerAgent, ("email", SET)),
+]
+
+# Local functions -> (handler, scope)
+FUNCTION_HANDLERS = {
+    "enrich_websites": ("enrich", BATCH),
+    "embedding_match": ("embedding_match", BATCH),
+    "rank_leads": ("rank", SET),
+}
+
+STAGE_KEYS = {"agent", "function", "inputs", "model", "concurrency", "cache", "enabled"}
+CACHE_POLICIES = ("none", "disk")
+
+
+class PipelineError(ValueError):
+    """Raised for pipeline definitions that cannot be compiled"""
+
+
+@dataclass
+class Stage:
+    """One compiled pipeline stage"""
+    name: str
+    handler: str
+    scope: str
+    inputs: List[str] = field(default_factory=list)
+    agent_class: Optional[type] = None
+    function: Optional[Callable] = None
+    model: Optional[str] = None
+    concurrency: int = 1
+    cache: str = "none"
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def produces_emails(self) -> bool:
+        return self.handler == "email"
+
+    def create_agent(self, llm_config: Dict[str, Any], **overrides):
+        """Instantiate this stage's agent, passing the options its constructor accepts"""
+        parameters = inspect.signature(self.agent_class.__init__).parameters
+        kwargs = {key: value for key, value in dict(self.options, **overrides).items()
+                  if key in parameters and key != "llm_config"}
+        return self.agent_class(llm_config, **kwargs).create_agent()
+
+
+class Pipeline:
+    """Compiled pipeline: stages in topological order, grouped for execution"""
+
+    def __init__(self, name: str, stages: List[Stage]):
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = stages
+        self.source = next(stage for stage in stages if stage.scope == SOURCE)
+        self.batch_stages = [stage for stage in stages if stage.scope == BATCH]
+        self.set_levels = self._levels([stage for stage in stages if stage.scope == SET])
+        consumed = {name for stage in stages if not stage.produces_emails for name in stage.inputs}
+        self.lead_sinks = [stage.name for stage in stages if not stage.produces_emails and stage.name not in consumed]
+        self.email_stages = [stage.name for stage in stages if stage.produces_emails]
+
+    def _levels(self, stages: List[Stage]) -> List[List[Stage]]:
+        """Group stages so that each level only depends on earlier levels"""
+        depth: Dict[str, int] = {}
+        for stage in self.order:
+            depth[stage.name] = max((depth[name] + 1 for name in stage.inputs), default=0)
+        levels: Dict[int, List[Stage]] = {}
+        for stage in stages:
+            levels.setdefault(depth[stage.name], []).append(stage)
+        return [levels[key] for key in sorted(levels)]
+
+    def find(self, handler: str) -> Optional[Stage]:
+        """First stage using a handler"""
+        return next((stage for stage in self.order if stage.handler == handler), None)
+
+    def agent_stages(self) -> List[Stage]:
+        """Agent stages in execution order, i.e. the group chat participants"""
+        return [stage for stage in self.order if stage.agent_class is not None]
+
+
+def _resolve_agent(name: str) -> Tuple[type, Tuple[str, str]]:
+    """Agent class by name from src.agents, or by dotted path 'package.module.Class'"""
+    if "." in name:
+        module_name, _, class_name = name.rpartition(".")
+        try:
+            agent_class = getattr(importlib.import_module(module_name), class_name, None)
+        except ImportError:
+            agent_class = None
+    else:
+        agent_class = getattr(agents, name, None)
+    if not inspect.isclass(agent_class) or not issubclass(agent_class, BaseAgent):
+        raise PipelineError(f"Unknown agent '{name}'")
+    for base, handler in AGENT_HANDLERS:
+        if issubclass(agent_class, base):
+            return agent_class, handler
+    raise PipelineError(f"Agent '{name}' does not extend a pipeline agent ({', '.join(b.__name__ for b, _ in AGENT_HANDLERS)})")
+
+
+def _resolve_function(name: str, options: Dict[str, Any]) -> Tuple[Optional[Callable], Tuple[str, str]]:
+    """Built-in function stage, or a custom 'package.module:function' run on lead batches"""
+    if name in FUNCTION_HANDLERS:
+        return None, FUNCTION_HANDLERS[name]
+    module_name, _, function_name = name.partition(":")
+    try:
+        function = getattr(importlib.import_module(module_name), function_name) if function_name else None
+    except (ImportError, AttributeError):
+        function = None
+    if not callable(function):
+        raise PipelineError(f"Unknown function '{name}', expected one of {sorted(FUNCTION_HANDLERS)} or 'module:function'")
+    scope = options.pop("scope", BATCH)
+    if scope not in (BATCH, SET):
+        raise PipelineError(f"Function stage '{name}' has invalid scope '{scope}'")
+    return function, ("custom", scope)
+
+
+def compile_pipeline(definition: Dict[str, Any]) -> Pipeline:
+    """Validate a pipeline definition and sort its stages into an execution graph"""
+    raw_stages = definition.get("stages") or {}
+    enabled = {name: spec for name, spec in raw_stages.items() if spec.get("enabled", True)}
+
+    def resolve_inputs(names: List[str], seen: Tuple[str, ...] = ()) -> List[str]:
+        # Disabled stages are skipped by wiring their dependents to their own inputs
+        resolved = []
+        for name in names:
+            if name not in raw_stages:
+                raise PipelineError(f"Unknown stage input '{name}'")
+            if name in seen:
+                raise PipelineError(f"Pipeline has a cycle through '{name}'")
+            targets = [name] if name in enabled else resolve_inputs(raw_stages[name].get("inputs", []), seen + (name,))
+            resolved.extend(target for target in targets if target not in resolved)
+        return resolved
+
+    stages = {}
+    for name, spec in enabled.items():
+        options = {key: value for key, value in spec.items() if key not in STAGE_KEYS}
+        if ("agent" in spec) == ("function" in spec):
+            raise PipelineError(f"Stage '{name}' needs exactly one of 'agent' or 'function'")
+        if "agent" in spec:
+            agent_class, (handler, scope) = _resolve_agent(spec["agent"])
+            function = None
+        else:
+            agent_class = None
+            function, (handler, scope) = _resolve_function(spec["function"], options)
+        cache = spec.get("cache", "none")
+        if cache not in CACHE_POLICIES:
+            raise PipelineError(f"Stage '{name}' has invalid cache policy '{cache}', expected one of {CACHE_POLICIES}")
+        stages[name] = Stage(
+            name=name,
+            handler=handler,
+            scope=scope,
+            inputs=resolve_inputs(spec.get("inputs", []), (name,)),
+            agent_class=agent_class,
+            function=function,
+            model=spec.get("model"),
+            concurrency=max(1, int(spec.get("concurrency", 1))),
+            cache=cache,
+            options=options,
+        )
+
+    sources = [stage for stage in stages.values() if stage.scope == SOURCE]
+    if len(sources) != 1 or sources[0].inputs:
+        raise PipelineError("Pipeline needs exactly one research stage without inputs")
+    for stage in stages.values():
+        if stage.scope != SOURCE and not stage.inputs:
+            raise PipelineError(f"Stage '{stage.name}' has no inputs")
+        for name in stage.inputs:
+            if stages[name].produces_emails:
+                raise PipelineError(f"Stage '{stage.name}' cannot take emails from '{name}' as input")
+            if stage.scope == BATCH and stages[name].scope == SET:
+                raise PipelineError(f"Batch stage '{stage.name}' cannot follow set stage '{name}'")
+
+    # Topological sort, keeping definition order among independent stages
+    order, placed = [], set()
+    while len(order) < len(stages):
+        ready = [stage for stage in stages.values() if stage.name not in placed and all(name in placed for name in stage.inputs)]
+        if not ready:
+            raise PipelineError("Pipeline stages form a cycle")
+        order.extend(ready)
+        placed.update(stage.name for stage in ready)
+    return Pipeline(definition.get("name", "custom"), order)
+
+
+_compiled: Dict[Any, Pipeline] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_pipeline(name: Optional[str] = None, for_chat: bool = False) -> Pipeline:
+    """Load and compile a pipeline once, recompiling only when its file or settings change"""
+    path = pipeline_path(name)
+    if path:
+        definition_key = (path, os.path.getmtime(path))
+    else:
+        definition = default_pipeline_definition(for_chat)
+        definition_key = json.dumps(definition, sort_keys=True)
+
+    with _compiled_lock:
+        if definition_key not in _compiled:
+            _compiled[definition_key] = compile_pipeline(load_pipeline_definition(path) if path else definition)
+        return _compiled[definition_key]
+
+
+def merge_leads(lists: List[List[LeadRecord]]) -> List[LeadRecord]:
+    """Union of lead lists by identity, keeping first-seen order"""
+    if len(lists) == 1:
+        return lists[0]
+    seen, merged = set(), []
+    for leads in lists:
+        for lead in leads:
+            if id(lead) not in seen:
+                seen.add(id(lead))
+                merged.append(lead)
+    return merged
+
+
+class PipelineRunner:
+    """Executes a compiled pipeline
+
+    Lead batches from the research stage flow through the batch stages as soon as they
+    arrive; each batch stage has its own worker pool and starts on a batch once all of its
+    inputs are done with that batch, so independent stages run in parallel. Set stages then
+    run level by level, stages of the same level in parallel.
+
+    A stage that fails keeps its input leads. Once the run is stopped by its deadline or
+    cancellation, remaining agent stages are skipped and local stages still run.
+    """
+
+    def __init__(self, pipeline: Pipeline, run_stage: Callable[[Stage, Any], Any],
+                 on_stop: Callable[[Exception], None], is_stopped: Callable[[], bool], console: Optional[Console] = None):
+        self.pipeline = pipeline
+        self.run_stage = run_stage
+        self.on_stop = on_stop
+        self.is_stopped = is_stopped
+        self.console = console or Console()
+
+    def _call(self, stage: Stage, leads: List[LeadRecord]) -> Any:
+        """Run one stage on some leads, falling back to its input on failure"""
+        fallback = [] if stage.produces_emails else leads
+        if stage.agent_class is not None and self.is_stopped():
+            return fallback
+        try:
+            return self.run_stage(stage, leads)
+        except (DeadlineExceeded, RunCancelled) as e:
+            self.on_stop(e)
+        except Exception as e:
+            self.console.print(f"[red]Stage '{stage.name}' failed: {e}[/red]")
+        return fallback
+
+    def _after(self, pool: ThreadPoolExecutor, stage: Stage, dependencies: List[Future]) -> Future:
+        """Future of a batch stage that is submitted once all its dependencies are done"""
+        result = Future()
+        remaining = [len(dependencies)]
+        lock = threading.Lock()
+
+        def start(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            leads = merge_leads([dependency.result() for dependency in dependencies])
+            pool.submit(self._call, stage, leads).add_done_callback(lambda done: result.set_result(done.result()))
+
+        for dependency in dependencies:
+            dependency.add_done_callback(start)
+        return result
+
+    def _run_batches(self, batches: Iterator[List[LeadRecord]]) -> Dict[str, List[LeadRecord]]:
+        """Stream research batches through the batch stages"""
+        pools = {stage.name: ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=stage.name)
+                 for stage in self.pipeline.batch_stages}
+        source = self.pipeline.source.name
+        batch_futures: List[Dict[str, Future]] = []
+        try:
+            try:
+                for batch in batches:
+                    futures = {source: Future()}
+                    futures[source].set_result(batch)
+                    for stage in self.pipeline.batch_stages:
+                        futures[stage.name] = self._after(pools[stage.name], stage, [futures[name] for name in stage.inputs])
+                    batch_futures.append(futures)
+            except (DeadlineExceeded, RunCancelled) as e:
+                self.on_stop(e)
+
+            outputs = {name: [] for name in [source] + [stage.name for stage in self.pipeline.batch_stages]}
+            for futures in batch_futures:
+                for name, future in futures.items():
+                    outputs[name].extend(future.result())
+            return outputs
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage, returning the output of each stage by name"""
+        outputs: Dict[str, Any] = self._run_batches(self.run_stage(self.pipeline.source, None))
+
+        for level in self.pipeline.set_levels:
+            inputs = {stage.name: merge_leads([outputs[name] for name in stage.inputs]) for stage in level}
+            if len(level) == 1:
+                stage = level[0]
+                outputs[stage.name] = self._call(stage, inputs[stage.name])
+                continue
+            with ThreadPoolExecutor(max_workers=len(level)) as executor:
+                futures = {stage.name: executor.submit(self._call, stage, inputs[stage.name]) for stage in level}
+                for name, future in futures.items():
+                    outputs[name] = future.result()
+        return outputs
+
+    def results(self, outputs: Dict[str, Any]) -> Tuple[List[LeadRecord], List[Any]]:
+        """Final (leads, emails): leads from stages no other stage consumes, emails from email stages"""
+        leads = merge_leads([outputs[name] for name in self.pipeline.lead_sinks]) if self.pipeline.lead_sinks else []
+        emails = [email for name in self.pipeline.email_stages for email in outputs[name]]
+        return leads, emails
@@ -0,0 +1,218 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+# Placeholder config for offline backends: agents can be created but never reach a provider.
+# A custom model client class keeps autogen from building an OpenAI client (and its SSL
+# context) for every agent; the client is never registered because the backend answers.
+OFFLINE_MODEL_CLIENT = "OfflineModelClient"
+OFFLINE_LLM_CONFIG = {
+    "config_list": [{
+        "model": "offline",
+        "api_key": "offline",
+        "base_url": "http://127.0.0.1:9/v1",
+        "model_client_cls": OFFLINE_MODEL_CLIENT,
+    }],
+    "temperature": 0.0,
+}
+
+
+class _OfflineClientLogFilter(logging.Filter):
+    """Drop autogen's per-agent notice that the offline model client is not registered"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return OFFLINE_MODEL_CLIENT not in record.getMessage()
+
+
+logging.getLogger("autogen.oai.client").addFilter(_OfflineClientLogFilter())
+
+
+class RunRecorder:
+    """Records a run's completions, timings, token counts and group chat messages
+
+    Recordings are gzip-compressed JSON lines: a "run" header, one "completion" event per
+    LLM call, optional "messages" with the full group chat, the "history" of ranked leads that
+    had already been exported, the homepage text of enriched leads ("enrichment") and a
+    closing "summary".
+    """
+
+    def __init__(self, prompt: str, target_count: Optional[int] = None, config: Optional[Dict[str, Any]] = None,
+                 run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.header = {
+            "type": "run",
+            "run_id": self.run_id,
+            "prompt": prompt,
+            "target_count": target_count,
+            "config": config or {},
+            "started_at": datetime.now().isoformat(),
+        }
+        self.events: List[Dict[str, Any]] = []
+        self.messages: Optional[List[Dict[str, Any]]] = None
+        self.history: Set[str] = set()
+        self.site_text: Dict[str, str] = {}
+        self.parse_results = defaultdict(lambda: {"ok": 0, "failed": 0})
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_completion(self, agent: str, input: str, output: str, duration: float,
+                          prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        """Record one LLM completion"""
+        event = {
+            "type": "completion",
+            "agent": agent,
+            "offset": round(time.monotonic() - self._started - duration, 4),
+            "duration": round(duration, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "input": input,
+            "output": output,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def record_parse(self, agent: str, ok: bool):
+        """Record whether an agent's reply parsed into the expected structure"""
+        with self._lock:
+            self.parse_results[agent]["ok" if ok else "failed"] += 1
+
+    def record_messages(self, messages: List[Dict[str, Any]]):
+        """Record the full group chat transcript"""
+        self.messages = [
+            {"name": msg.get("name"), "role": msg.get("role"), "content": msg.get("content")}
+            for msg in messages
+        ]
+
+    def record_history(self, known: Set[str]):
+        """Record ranked companies (normalized names) that were already in the lead history"""
+        with self._lock:
+            self.history.update(known)
+
+    def record_site_text(self, site_text: Dict[str, str]):
+        """Record homepage text fetched for leads, by normalized company name"""
+        with self._lock:
+            self.site_text.update(site_text)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate LLM calls, tokens and per-agent latency for the run"""
+        with self._lock:
+            events = list(self.events)
+            parse_results = {agent: dict(counts) for agent, counts in self.parse_results.items()}
+
+        stage_seconds = defaultdict(list)
+        for event in events:
+            stage_seconds[event["agent"]].append(event["duration"])
+
+        prompt_tokens = sum(event["prompt_tokens"] for event in events)
+        cached_tokens = sum(event.get("cached_tokens", 0) for event in events)
+        return {
+            "llm_calls": len(events),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(event["completion_tokens"] for event in events),
+            "cached_prompt_tokens": cached_tokens,
+            # Share of prompt tokens served from the provider's prefix cache
+            "prompt_cache_hit_rate": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else None,
+            "llm_seconds": round(sum(event["duration"] for event in events), 4),
+            "duration": round(time.monotonic() - self._started, 4),
+            "stage_seconds": dict(stage_seconds),
+            "parse_results": parse_results,
+        }
+
+    def save(self, directory: str, result: Optional[Dict[str, Any]] = None) -> str:
+        """Write the recording to <directory>/<run_id>.jsonl.gz and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.jsonl.gz")
+        summary = dict(self.summary(), type="summary")
+        if result is not None:
+            summary.update({
+                "leads": len(result.get("leads", [])),
+                "emails": len(result.get("emails", [])),
+                "partial": result.get("partial", False),
+            })
+
+        with self._lock:
+            events = list(self.events)
+            history = sorted(self.history)
+            site_text = dict(self.site_text)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for line in [self.header, *events]:
+                f.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+            if self.messages is not None:
+                f.write(json.dumps({"type": "messages", "messages": self.messages}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.write(json.dumps({"type": "history", "known": history}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            if site_text:
+                f.write(json.dumps({"type": "enrichment", "site_text": site_text}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.write(json.dumps(summary, separators=(",", ":")) + "\n")
+        return path
+
+
+def load_recording(path: str) -> Dict[str, Any]:
+    """Load a recording written by RunRecorder.save"""
+    recording = {"header": None, "completions": [], "messages": None, "history": None, "site_text": None, "summary": None}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event["type"] == "run":
+                recording["header"] = event
+            elif event["type"] == "completion":
+                recording["completions"].append(event)
+            elif event["type"] == "messages":
+                recording["messages"] = event["messages"]
+            elif event["type"] == "history":
+                recording["history"] = event["known"]
+            elif event["type"] == "enrichment":
+                recording["site_text"] = event["site_text"]
+            elif event["type"] == "summary":
+                recording["summary"] = event
+    if recording["header"] is None:
+        raise ValueError(f"{path} is not a run recording")
+    return recording
+
+
+class ReplayBackend:
+    """Offline LLM backend answering from a recording
+
+    Replies are matched on (agent, input) first, so concurrent stages get the answer to the
+    exact prompt they sent. Inputs that differ from the recording (e.g. exclusion lists that
+    depend on arrival order) fall back to the agent's next unused reply in recorded order.
+    """
+
+    def __init__(self, recording: Dict[str, Any], latency_scale: float = 0.0):
+        self.latency_scale = latency_scale
+        self._by_input = defaultdict(deque)
+        self._by_agent = defaultdict(deque)
+        for event in recording["completions"]:
+            self._by_input[(event["agent"], event["input"])].append(event)
+            self._by_agent[event["agent"]].append(event)
+        self._used = set()
+        self._lock = threading.Lock()
+
+    def _take(self, queue: deque) -> Optional[Dict[str, Any]]:
+        while queue:
+            event = queue.popleft()
+            if id(event) not in self._used:
+                self._used.add(id(event))
+                return event
+        return None
+
+    def llm_config(self) -> Dict[str, Any]:
+        return dict(OFFLINE_LLM_CONFIG)
+
+    def generate(self, agent_name: str, messages: List[Dict[str, Any]], system_message: str = "") -> str:
+        """Return the recorded reply for this agent and input"""
+        content = (messages[-1].get("content") if messages else "") or ""
+        with self._lock:
+            event = self._take(self._by_input[(agent_name, content)]) or self._take(self._by_agent[agent_name])
+        if event is None:
+            raise KeyError(f"Recording has no more replies for agent '{agent_name}'")
+        if self.latency_scale:
+            time.sleep(event["duration"] * self.latency_scale)
+        return event["output"]
@@ -0,0 +1,108 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional
+from rich.console import Console
+
+from ..agents import ResearcherAgent, QueryPlannerAgent
+from ..utils import extract_json_from_text, validate_leads_structure, LeadRecord
+from ..utils.dedupe import LeadDeduplicator
+from .llm import LLMSession, complete
+from .deadline import DeadlineExceeded, RunCancelled
+
+
+class ChunkedResearcher:
+    """Researches large lead counts by fanning sub-queries out concurrently"""
+
+    def __init__(self, llm_config: Dict[str, Any], chunk_size: int = 10, concurrency: int = 4,
+                 max_rounds: int = 3, console: Optional[Console] = None, session: Optional[LLMSession] = None,
+                 agent_class: type = ResearcherAgent):
+        self.llm_config = llm_config
+        self.agent_class = agent_class
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.max_rounds = max(1, max_rounds)
+        self.console = console or Console()
+        self.session = session or LLMSession()
+
+    def plan_sub_queries(self, prompt: str, count: int, covered: List[str]) -> List[str]:
+        """Split the prompt into up to `count` narrower sub-queries"""
+        content = f"Research prompt: {prompt}\nNumber of sub-queries: {count}"
+        if covered:
+            content += "\nAlready covered, do not repeat:\n" + "\n".join(f"- {query}" for query in covered)
+
+        try:
+            planner = QueryPlannerAgent(self.llm_config).create_agent()
+            planned = extract_json_from_text(complete(planner, content, self.session)) or []
+            self.session.record_parse(planner.name, bool(planned))
+        except (DeadlineExceeded, RunCancelled):
+            raise
+        except Exception as e:
+            self.console.print(f"[red]Query planning failed: {e}[/red]")
+            planned = []
+
+        queries = [str(item.get("query", "")).strip() for item in planned if isinstance(item, dict)]
+        queries = [query for query in queries if query and query not in covered]
+        if not queries:
+            self.console.print("[yellow]⚠ No sub-queries planned, falling back to the original prompt[/yellow]")
+            queries = [prompt]
+        return queries[:count]
+
+    def _research(self, query: str, exclude: List[str]) -> List[LeadRecord]:
+        """Research a single sub-query"""
+        researcher = self.agent_class(self.llm_config, company_count=self.chunk_size).create_agent()
+        content = query
+        if exclude:
+            content += "\n\nDo not include these companies: " + ", ".join(exclude)
+
+        leads = extract_json_from_text(complete(researcher, content, self.session))
+        valid = bool(leads) and validate_leads_structure(leads)
+        self.session.record_parse(researcher.name, valid)
+        if not valid:
+            self.console.print(f"[yellow]⚠ Invalid lead structure for sub-query: {query[:80]}[/yellow]")
+            return []
+        return [LeadRecord.from_dict(lead) for lead in leads]
+
+    def iter_batches(self, prompt: str, target_count: int) -> Iterator[List[LeadRecord]]:
+        """Yield batches of de-duplicated leads as sub-queries complete"""
+        dedupe = LeadDeduplicator()
+        found_names: List[str] = []
+        covered: List[str] = []
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        try:
+            for round_number in range(self.max_rounds):
+                self.session.deadline.check("research")
+                remaining = target_count - len(found_names)
+                if remaining <= 0:
+                    break
+
+                query_count = math.ceil(remaining / self.chunk_size)
+                if round_number == 0 and query_count == 1:
+                    queries = [prompt]
+                else:
+                    queries = self.plan_sub_queries(prompt, query_count, covered)
+                covered.extend(queries)
+                self.console.print(f"[blue]Research round {round_number + 1}: {len(queries)} sub-queries for {remaining} leads[/blue]")
+
+                # Only a bounded sample of known names is sent to keep prompts short
+                exclude = found_names[-50:]
+                futures = [executor.submit(self._research, query, exclude) for query in queries]
+                for future in as_completed(futures):
+                    try:
+                        leads = future.result()
+                    except (DeadlineExceeded, RunCancelled):
+                        raise
+                    except Exception as e:
+                        self.console.print(f"[red]Sub-query research failed: {e}[/red]")
+                        continue
+
+                    fresh = dedupe.filter(leads)[:target_count - len(found_names)]
+                    if fresh:
+                        found_names.extend(lead.company for lead in fresh)
+                        self.console.print(f"[green]✔ {len(found_names)}/{target_count} leads researched[/green]")
+                        yield fresh
+
+                    if len(found_names) >= target_count:
+                        break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
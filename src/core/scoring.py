@@ -0,0 +1,96 @@
+import numpy as np
+from typing import List, Optional, Set
+
+from ..utils.dedupe import normalize_company_name, normalize_domain
+from ..utils.records import LeadRecord
+from .matching import CapabilityMatcher, tokenize
+
+FEATURE_WEIGHTS = {
+    "industry_fit": 0.35,
+    "match_similarity": 0.35,
+    "completeness": 0.2,
+    "novelty": 0.1,
+}
+
+# Words that describe the request rather than the target industry
+PROMPT_NOISE = frozenset(tokenize(
+    "find research list companies company business businesses that who which could would might need needs "
+    "benefit looking want top best good relevant potential leads lead system systems solution solutions"
+))
+
+
+def _industry_fit(leads: List[LeadRecord], prompt: str) -> np.ndarray:
+    """Fraction of the prompt's industry terms present in each lead"""
+    vocabulary = sorted(set(tokenize(prompt)) - PROMPT_NOISE)
+    if not vocabulary:
+        return np.full(len(leads), 0.5, dtype=np.float32)
+
+    term_index = {term: i for i, term in enumerate(vocabulary)}
+    presence = np.zeros((len(leads), len(vocabulary)), dtype=np.bool_)
+    for row, lead in enumerate(leads):
+        text = f"{lead.description} {lead.products} {lead.match}"
+        columns = [term_index[token] for token in set(tokenize(text)) if token in term_index]
+        presence[row, columns] = True
+    return presence.mean(axis=1, dtype=np.float32)
+
+
+def _match_similarity(leads: List[LeadRecord], matcher: Optional[CapabilityMatcher]) -> np.ndarray:
+    """Capability similarity per lead, computing it for leads that were matched by the LLM"""
+    similarity = np.array(
+        [np.nan if lead.match_score is None else lead.match_score for lead in leads], dtype=np.float32
+    )
+    missing = np.isnan(similarity)
+    if missing.any():
+        if matcher is not None:
+            _, scores = matcher.score([lead for lead, is_missing in zip(leads, missing) if is_missing])
+            similarity[missing] = scores
+        else:
+            similarity[missing] = 0.5
+    return np.clip(similarity, 0.0, 1.0)
+
+
+def _completeness(leads: List[LeadRecord]) -> np.ndarray:
+    """Share of useful fields that are filled in"""
+    filled = np.array([
+        (
+            bool(normalize_domain(lead.website)),
+            bool(lead.products),
+            len(lead.description) >= 40,
+            bool(lead.match),
+        )
+        for lead in leads
+    ], dtype=np.float32).reshape(len(leads), 4)
+    return filled.mean(axis=1)
+
+
+def _novelty(leads: List[LeadRecord], history: Set[str]) -> np.ndarray:
+    """1.0 for companies never exported before, 0.0 for ones already in the lead history"""
+    return np.array(
+        [normalize_company_name(lead.company) not in history for lead in leads],
+        dtype=np.float32
+    )
+
+
+def compute_features(leads: List[LeadRecord], prompt: str, history: Set[str],
+                     matcher: Optional[CapabilityMatcher] = None) -> np.ndarray:
+    """Build the (n_leads, n_features) feature matrix in FEATURE_WEIGHTS order"""
+    columns = {
+        "industry_fit": _industry_fit(leads, prompt),
+        "match_similarity": _match_similarity(leads, matcher),
+        "completeness": _completeness(leads),
+        "novelty": _novelty(leads, history),
+    }
+    return np.column_stack([columns[name] for name in FEATURE_WEIGHTS])
+
+
+def rank_leads(leads: List[LeadRecord], prompt: str, history: Set[str],
+               matcher: Optional[CapabilityMatcher] = None) -> List[LeadRecord]:
+    """Set each lead's score in place and return them sorted best first"""
+    if not leads:
+        return []
+
+    weights = np.array(list(FEATURE_WEIGHTS.values()), dtype=np.float32)
+    scores = compute_features(leads, prompt, history, matcher) @ weights
+    for lead, score in zip(leads, scores.tolist()):
+        lead.score = round(score, 4)
+    return [leads[i] for i in np.argsort(-scores, kind="stable").tolist()]
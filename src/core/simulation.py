@@ -0,0 +1,194 @@
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config import get_simulation_config
+from ..utils import extract_json_from_text
+from .recording import OFFLINE_LLM_CONFIG
+
+COUNT_PATTERN = re.compile(r'Number of companies to find: (\d+)(?:\s*-\s*(\d+))?')
+TEMPLATE_COUNT_PATTERN = re.compile(r'Number of templates to write: (\d+)')
+SUB_QUERY_COUNT_PATTERN = re.compile(r'Number of sub-queries: (\d+)')
+
+NAME_WORDS = ["Precision", "Global", "Apex", "Summit", "Delta", "Metro", "United", "Prime", "Northern", "Pacific"]
+INDUSTRY_WORDS = ["Plastics", "Foods", "Motors", "Electronics", "Packaging", "Textiles", "Steel", "Pharma", "Glass", "Paper"]
+SUFFIXES = ["Inc.", "LLC", "Ltd", "Corp", "Group"]
+FILLER_WORDS = [
+    "manufacturer", "regional", "export", "production", "lines", "quality", "assembly", "supplier", "automated",
+    "plant", "inspection", "logistics", "packaging", "components", "industrial", "customers", "capacity", "process",
+]
+CAPABILITIES = [
+    ("vision-quality", "vision inspection quality defects", "Vision AI can catch defects on {products} lines before they ship."),
+    ("automation", "automation robotics assembly throughput", "Industrial automation can raise throughput of {products} assembly."),
+    ("predictive", "maintenance downtime sensors", "Predictive maintenance can cut unplanned downtime in {products} plants."),
+]
+# Ways a noisy reply goes wrong: wrapped in prose (still parses), cut off mid-JSON, missing a
+# required field, or repeating a company under a slightly different name
+NOISE_KINDS = ("prose", "truncated", "missing_field", "duplicate")
+
+
+class SimulatedProviderError(RuntimeError):
+    """Raised by the simulation backend to stand in for a failed provider call"""
+
+
+class SimulationBackend:
+    """Offline LLM backend that answers every agent with synthetic JSON
+
+    Replies follow each agent's output format and are built from the agent's input, so the
+    real parsing, validation, matching, merging, ranking and storage code runs on them.
+    Reply size, the share of malformed replies, provider errors and a log-normal latency
+    distribution are configurable, which makes it usable for load tests without a provider.
+    Each instance draws a different sequence, reproducible for a given seed and creation order.
+    """
+
+    _instances = itertools.count()
+
+    def __init__(self, latency_median: float = 0.05, latency_sigma: float = 0.5, noise: float = 0.05,
+                 error_rate: float = 0.0, text_words: int = 20, seed: Optional[int] = None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.noise = noise
+        self.error_rate = error_rate
+        self.text_words = max(1, text_words)
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.seed = base_seed * 1_000_003 + next(SimulationBackend._instances)
+        self._calls = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "SimulationBackend":
+        config = get_simulation_config()
+        config.pop("enabled")
+        return cls(**config)
+
+    def llm_config(self) -> Dict[str, Any]:
+        return dict(OFFLINE_LLM_CONFIG)
+
+    def _rng(self) -> random.Random:
+        """Independent generator per call, reproducible for a given seed and call order"""
+        with self._lock:
+            call = next(self._calls)
+        return random.Random(self.seed * 1_000_003 + call)
+
+    def generate(self, agent_name: str, messages: List[Dict[str, Any]], system_message: str = "") -> str:
+        """Synthetic reply for an agent, after a simulated provider latency"""
+        rng = self._rng()
+        if self.latency_median > 0:
+            time.sleep(self.latency_median * math.exp(self.latency_sigma * rng.gauss(0, 1)))
+        if rng.random() < self.error_rate:
+            raise SimulatedProviderError(f"Simulated provider error for {agent_name}")
+
+        content = (messages[-1].get("content") if messages else "") or ""
+        if agent_name == "QueryPlanner":
+            items = self._queries(rng, content)
+        elif agent_name == "Researcher":
+            items = self._companies(rng, content, system_message)
+        elif agent_name == "Matcher":
+            items = self._matches(rng, self._input_leads(messages))
+        elif agent_name == "LeadLogger":
+            items = self._logged_leads(messages)
+        elif agent_name == "EmailAgent":
+            items = self._emails(rng, self._input_leads(messages), system_message)
+        else:
+            items = []
+        return self._render(rng, items)
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(FILLER_WORDS) for _ in range(words)).capitalize() + "."
+
+    def _queries(self, rng: random.Random, content: str) -> List[Dict[str, Any]]:
+        match = SUB_QUERY_COUNT_PATTERN.search(content)
+        count = int(match.group(1)) if match else 3
+        prompt = content.splitlines()[0].replace("Research prompt: ", "") if content else "companies"
+        return [{"query": f"{prompt} in {rng.choice(NAME_WORDS)} region, segment {i + 1}"} for i in range(count)]
+
+    def _companies(self, rng: random.Random, query: str, system_message: str) -> List[Dict[str, Any]]:
+        match = COUNT_PATTERN.search(system_message)
+        if match:
+            low, high = int(match.group(1)), int(match.group(2) or match.group(1))
+            count = rng.randint(low, high)
+        else:
+            count = rng.randint(3, 5)
+        companies = []
+        for _ in range(count):
+            industry = rng.choice(INDUSTRY_WORDS)
+            name = f"{rng.choice(NAME_WORDS)} {industry} {rng.randrange(100000)}"
+            companies.append({
+                "company": name,
+                "website": f"https://www.{name.lower().replace(' ', '')}.com" if rng.random() < 0.8 else "N/A",
+                "description": f"{name} is a {industry.lower()} company. {self._text(rng, self.text_words)}",
+                "products": f"{industry} products, {rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)}",
+            })
+        return companies
+
+    @staticmethod
+    def _input_leads(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Most recent list of companies in the conversation"""
+        for message in reversed(messages):
+            items = extract_json_from_text((message.get("content") or "").strip())
+            if isinstance(items, list) and items and all(isinstance(item, dict) and "company" in item for item in items):
+                if any("description" in item or "products" in item for item in items):
+                    return items
+        return []
+
+    def _matches(self, rng: random.Random, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{
+            "company": lead["company"],
+            "match": rng.choice(CAPABILITIES)[2].format(products=lead.get("products") or "production"),
+        } for lead in leads]
+
+    def _logged_leads(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Researched companies merged with the Matcher's suggestions"""
+        leads = self._input_leads(messages)
+        match_by_company = {}
+        for message in messages:
+            items = extract_json_from_text((message.get("content") or "").strip())
+            if isinstance(items, list):
+                for item in items:
+                    if isinstance(item, dict) and "match" in item and "description" not in item:
+                        match_by_company[item.get("company")] = item["match"]
+        return [{
+            "company": lead["company"],
+            "website": lead.get("website", "N/A"),
+            "description": lead.get("description", ""),
+            "products": lead.get("products", ""),
+            "match": lead.get("match") or match_by_company.get(lead["company"], ""),
+        } for lead in leads]
+
+    def _emails(self, rng: random.Random, leads: List[Dict[str, Any]], system_message: str) -> List[Dict[str, Any]]:
+        match = TEMPLATE_COUNT_PATTERN.search(system_message)
+        if match:
+            return [{
+                "template_id": template_id,
+                "focus": focus,
+                "subject": f"{template_id.replace('-', ' ').title()} for {{company}}",
+                "body": f"Dear {{company}} Team,\n\n{{match}}\n\n{self._text(rng, self.text_words)}\n\nBest regards,\nReplicant Systems Team",
+            } for template_id, focus, _ in CAPABILITIES[:int(match.group(1))]]
+        return [{
+            "company": lead["company"],
+            "email": (f"Subject: Partnership Opportunity for {lead['company']}\n\nDear {lead['company']} Team,\n\n"
+                      f"{lead.get('match', '')}\n\n{self._text(rng, self.text_words * 3)}\n\nBest regards,\nReplicant Systems Team"),
+        } for lead in leads]
+
+    def _render(self, rng: random.Random, items: List[Dict[str, Any]]) -> str:
+        """Serialize a reply, corrupting it in one of the NOISE_KINDS ways with probability `noise`"""
+        kind = rng.choice(NOISE_KINDS) if items and rng.random() < self.noise else None
+        if kind == "missing_field":
+            items = [dict(item) for item in items]
+            items[rng.randrange(len(items))].pop(next(iter(items[0])), None)
+        elif kind == "duplicate" and "company" in items[0]:
+            duplicate = dict(rng.choice(items))
+            duplicate["company"] = f"{duplicate['company']} {rng.choice(SUFFIXES)}"
+            items = items + [duplicate]
+
+        text = json.dumps(items, ensure_ascii=False, indent=2)
+        if kind == "truncated":
+            return text[:rng.randrange(1, max(2, len(text) // 2))]
+        if kind == "prose":
+            return f"Here is the result you asked for:\n```json\n{text}\n```\nLet me know if you need anything else."
+        return text
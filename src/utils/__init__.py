@@ -1,11 +1,30 @@
 from .json_parser import extract_json_from_text
-from .validators import validate_leads_structure, validate_emails_structure
-from .file_handler import save_leads_to_excel, save_emails_to_json
+from .validators import validate_leads_structure, validate_emails_structure, validate_templates_structure
+from .records import LeadRecord, EmailRecord, LEAD_FIELDS, EMAIL_FIELDS
+from .file_handler import (
+    save_leads_to_excel,
+    save_leads_to_csv,
+    save_emails_to_json,
+    save_templates_to_json,
+    load_lead_history,
+    update_lead_history
+)
+from .email_templates import render_emails
 
 __all__ = [
     "extract_json_from_text",
     "validate_leads_structure", 
     "validate_emails_structure",
+    "validate_templates_structure",
+    "LeadRecord",
+    "EmailRecord",
+    "LEAD_FIELDS",
+    "EMAIL_FIELDS",
     "save_leads_to_excel",
-    "save_emails_to_json"
-]
\ No newline at end of file
+    "save_leads_to_csv",
+    "save_emails_to_json",
+    "save_templates_to_json",
+    "load_lead_history",
+    "update_lead_history",
+    "render_emails"
+]
@@ -0,0 +1,51 @@
+import re
+from typing import List, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .records import LeadRecord
+
+COMPANY_SUFFIXES = re.compile(
+    r'\b(inc|incorporated|llc|ltd|limited|corp|corporation|co|company|plc|gmbh|pvt|private|group|holdings)\b\.?'
+)
+
+
+def normalize_company_name(name: str) -> str:
+    """Normalize a company name for duplicate detection"""
+    name = name.lower().replace("&", " and ")
+    name = COMPANY_SUFFIXES.sub(" ", name)
+    return re.sub(r'[^a-z0-9]+', '', name)
+
+
+def normalize_domain(website: str) -> str:
+    """Extract a bare domain from a website value, or an empty string"""
+    website = (website or "").strip().lower()
+    if not website or website in ("n/a", "na", "none", "unknown"):
+        return ""
+    website = re.sub(r'^[a-z]+://', '', website)
+    domain = website.split('/')[0].split(':')[0]
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain if "." in domain else ""
+
+
+class LeadDeduplicator:
+    """Tracks seen companies by normalized name and domain"""
+    
+    def __init__(self):
+        self.seen_names: Set[str] = set()
+        self.seen_domains: Set[str] = set()
+    
+    def add(self, lead: "LeadRecord") -> bool:
+        """Register a lead, returning False if it duplicates one already seen"""
+        name = normalize_company_name(lead.company)
+        domain = normalize_domain(lead.website)
+        if not name or name in self.seen_names or (domain and domain in self.seen_domains):
+            return False
+        self.seen_names.add(name)
+        if domain:
+            self.seen_domains.add(domain)
+        return True
+    
+    def filter(self, leads: List["LeadRecord"]) -> List["LeadRecord"]:
+        """Return only the leads not seen before, registering them"""
+        return [lead for lead in leads if self.add(lead)]
@@ -0,0 +1,62 @@
+import re
+from typing import List, Dict, Any
+
+from .records import LeadRecord, EmailRecord
+
+SLOT_PATTERN = re.compile(r'\{(company|match|products)\}')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _first_sentence(text: str) -> str:
+    """Return the first sentence of a match suggestion"""
+    text = " ".join(text.split())
+    match = re.match(r'(.+?[.!?])(\s|$)', text)
+    sentence = match.group(1) if match else text
+    if sentence and sentence[-1] not in ".!?":
+        sentence += "."
+    return sentence
+
+
+def _slot_values(lead: LeadRecord) -> Dict[str, str]:
+    """Build placeholder values for a lead"""
+    return {
+        "company": lead.company,
+        "match": _first_sentence(lead.match),
+        "products": lead.products or "products",
+    }
+
+
+def fill_slots(text: str, values: Dict[str, str]) -> str:
+    """Replace {company}/{match}/{products} placeholders, leaving other braces untouched"""
+    return SLOT_PATTERN.sub(lambda m: values[m.group(1)], text)
+
+
+def select_template(templates: List[Dict[str, Any]], lead: LeadRecord) -> Dict[str, Any]:
+    """Pick the template whose focus keywords overlap most with the lead"""
+    lead_words = set(WORD_PATTERN.findall(f"{lead.match} {lead.products} {lead.description}".lower()))
+    best, best_hits = templates[0], 0
+    for template in templates:
+        focus_words = set(WORD_PATTERN.findall(str(template.get("focus", "")).lower()))
+        hits = len(focus_words & lead_words)
+        if hits > best_hits:
+            best, best_hits = template, hits
+    return best
+
+
+def render_emails(templates: List[Dict[str, Any]], leads: List[LeadRecord]) -> List[EmailRecord]:
+    """Render one email per lead from reusable templates"""
+    emails = []
+    for lead in leads:
+        if not lead.company:
+            continue
+        template = select_template(templates, lead)
+        values = _slot_values(lead)
+        subject = fill_slots(template["subject"], values)
+        body = fill_slots(template["body"], values)
+        emails.append(EmailRecord(
+            company=lead.company,
+            email=f"Subject: {subject}\n\n{body}",
+            subject=subject,
+            template_id=str(template.get("template_id", "")),
+        ))
+    return emails
@@ -1,30 +1,117 @@
+import csv
 import json
+import os
+import threading
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Optional, IO, Union
 from rich.console import Console
 
+from .dedupe import normalize_company_name
+from .records import LeadRecord, EmailRecord, LEAD_FIELDS, EMAIL_FIELDS
+
 console = Console()
+# Serializes read-modify-write of the lead history between concurrent runs
+_history_lock = threading.Lock()
+
+
+def leads_to_dataframe(leads: List[LeadRecord]) -> pd.DataFrame:
+    """Build a DataFrame straight from record rows"""
+    return pd.DataFrame.from_records((lead.as_row() for lead in leads), columns=LEAD_FIELDS)
+
 
+def emails_to_dataframe(emails: List[EmailRecord]) -> pd.DataFrame:
+    """Build a DataFrame straight from record rows"""
+    return pd.DataFrame.from_records((email.as_row() for email in emails), columns=EMAIL_FIELDS)
 
-def save_leads_to_excel(leads: List[Dict[str, Any]], filename: str = "lead_tracker.xlsx") -> bool:
-    """Save leads to Excel file"""
+
+def save_leads_to_excel(leads: List[LeadRecord], filename: Union[str, IO[bytes]] = "lead_tracker.xlsx",
+                        emails: Optional[List[EmailRecord]] = None) -> bool:
+    """Save leads (and optionally emails on a second sheet) to Excel file"""
     try:
-        df = pd.DataFrame(leads)
-        df.to_excel(filename, index=False)
-        console.print(f"[cyan]Saved leads to [bold]{filename}[/bold][/cyan]")
+        with pd.ExcelWriter(filename) as writer:
+            leads_to_dataframe(leads).to_excel(writer, sheet_name="Leads", index=False)
+            if emails:
+                emails_to_dataframe(emails).to_excel(writer, sheet_name="Emails", index=False)
+        if isinstance(filename, str):
+            console.print(f"[cyan]Saved leads to [bold]{filename}[/bold][/cyan]")
         return True
     except Exception as e:
         console.print(f"[red]Failed to save Excel file: {e}[/red]")
         return False
 
 
-def save_emails_to_json(emails: List[Dict[str, Any]], filename: str = "emails.json") -> bool:
+def save_leads_to_csv(leads: List[LeadRecord], filename: Union[str, IO[str]] = "lead_tracker.csv") -> bool:
+    """Save leads to CSV file, writing rows directly from the records"""
+    try:
+        if isinstance(filename, str):
+            with open(filename, "w", encoding='utf-8', newline='') as f:
+                _write_csv(leads, f)
+            console.print(f"[cyan]Saved leads to [bold]{filename}[/bold][/cyan]")
+        else:
+            _write_csv(leads, filename)
+        return True
+    except Exception as e:
+        console.print(f"[red]Failed to save CSV file: {e}[/red]")
+        return False
+
+
+def _write_csv(leads: List[LeadRecord], f: IO[str]):
+    writer = csv.writer(f)
+    writer.writerow(LEAD_FIELDS)
+    writer.writerows(lead.as_row() for lead in leads)
+
+
+def save_emails_to_json(emails: List[EmailRecord], filename: str = "emails.json") -> bool:
     """Save emails to JSON file"""
     try:
         with open(filename, "w", encoding='utf-8') as f:
-            json.dump(emails, f, indent=2, ensure_ascii=False)
+            json.dump([email.to_dict() for email in emails], f, indent=2, ensure_ascii=False)
         console.print(f"[cyan]Saved emails to [bold]{filename}[/bold][/cyan]")
         return True
     except Exception as e:
         console.print(f"[red]Failed to save emails file: {e}[/red]")
-        return False
\ No newline at end of file
+        return False
+
+
+def save_templates_to_json(templates: List[Dict[str, Any]], filename: str = "email_templates.json") -> bool:
+    """Save reusable email templates to JSON file"""
+    try:
+        with open(filename, "w", encoding='utf-8') as f:
+            json.dump(templates, f, indent=2, ensure_ascii=False)
+        console.print(f"[cyan]Saved email templates to [bold]{filename}[/bold][/cyan]")
+        return True
+    except Exception as e:
+        console.print(f"[red]Failed to save email templates file: {e}[/red]")
+        return False
+
+
+def load_lead_history(filename: str = "lead_history.json") -> Set[str]:
+    """Load normalized names of companies that were already exported"""
+    if not os.path.exists(filename):
+        return set()
+    try:
+        with open(filename, encoding='utf-8') as f:
+            return set(json.load(f))
+    except Exception as e:
+        console.print(f"[red]Failed to load lead history: {e}[/red]")
+        return set()
+
+
+def update_lead_history(leads: List[LeadRecord], filename: str = "lead_history.json") -> bool:
+    """Add exported companies to the lead history file
+    
+    The file is replaced atomically, so concurrent runs never read a half-written history.
+    """
+    with _history_lock:
+        history = load_lead_history(filename)
+        history.update(normalize_company_name(lead.company) for lead in leads)
+        history.discard("")
+        tmp_filename = f"{filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_filename, "w", encoding='utf-8') as f:
+                json.dump(sorted(history), f)
+            os.replace(tmp_filename, filename)
+            return True
+        except Exception as e:
+            console.print(f"[red]Failed to save lead history: {e}[/red]")
+            return False
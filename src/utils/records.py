@@ -0,0 +1,108 @@
+import sys
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Optional, Tuple
+
+from .dedupe import normalize_domain
+
+
+def _text(value: Any) -> str:
+    """Coerce an LLM-provided field to a stripped string"""
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value).strip()
+
+
+def _number(value: Any) -> Optional[float]:
+    """Coerce an optional numeric field, ignoring non-numeric values"""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class LeadRecord:
+    """Compact lead record used from parsing to export"""
+    company: str
+    website: str = "N/A"
+    description: str = ""
+    products: str = ""
+    match: str = ""
+    capability: str = ""
+    match_score: Optional[float] = None
+    score: Optional[float] = None
+    site_text: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LeadRecord":
+        """Build a record from parsed LLM output, interning company and domain strings"""
+        website = _text(data.get("website")) or "N/A"
+        if normalize_domain(website):
+            website = sys.intern(website)
+        return cls(
+            company=sys.intern(_text(data.get("company"))),
+            website=website,
+            description=_text(data.get("description")),
+            products=_text(data.get("products")),
+            match=_text(data.get("match")),
+            capability=sys.intern(_text(data.get("capability"))),
+            match_score=_number(data.get("match_score")),
+            score=_number(data.get("score")),
+            site_text=_text(data.get("site_text")),
+        )
+
+    def to_prompt_dict(self) -> Dict[str, str]:
+        """Fields worth sending back to an agent"""
+        data = {
+            "company": self.company,
+            "website": self.website,
+            "description": self.description,
+            "products": self.products,
+            "match": self.match,
+        }
+        if self.site_text:
+            data["site_text"] = self.site_text
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All fields as a plain dict"""
+        return {name: getattr(self, name) for name in LEAD_FIELDS}
+
+    def as_row(self) -> Tuple[Any, ...]:
+        """All fields as a tuple in LEAD_FIELDS order"""
+        return tuple(getattr(self, name) for name in LEAD_FIELDS)
+
+
+@dataclass(slots=True)
+class EmailRecord:
+    """Compact email record used from parsing to export"""
+    company: str
+    email: str
+    subject: str = ""
+    template_id: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmailRecord":
+        """Build a record from parsed LLM output, interning the company name"""
+        email = _text(data.get("email"))
+        subject = _text(data.get("subject"))
+        if not subject and email.startswith("Subject:"):
+            subject = email.split("\n", 1)[0][len("Subject:"):].strip()
+        return cls(
+            company=sys.intern(_text(data.get("company"))),
+            email=email,
+            subject=subject,
+            template_id=sys.intern(_text(data.get("template_id"))),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All fields as a plain dict"""
+        return {name: getattr(self, name) for name in EMAIL_FIELDS}
+
+    def as_row(self) -> Tuple[Any, ...]:
+        """All fields as a tuple in EMAIL_FIELDS order"""
+        return tuple(getattr(self, name) for name in EMAIL_FIELDS)
+
+
+LEAD_FIELDS = tuple(field.name for field in fields(LeadRecord))
+EMAIL_FIELDS = tuple(field.name for field in fields(EmailRecord))
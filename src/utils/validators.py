@@ -27,3 +27,17 @@ def validate_emails_structure(emails: List[Dict[str, Any]]) -> bool:
         if not all(field in email for field in required_fields):
             return False
     return True
+
+
+def validate_templates_structure(templates: List[Dict[str, Any]]) -> bool:
+    """Validate that email templates have required fields"""
+    if not isinstance(templates, list) or not templates:
+        return False
+    
+    required_fields = ['subject', 'body']
+    for template in templates:
+        if not isinstance(template, dict):
+            return False
+        if not all(isinstance(template.get(field), str) for field in required_fields):
+            return False
+    return True